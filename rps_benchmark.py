@@ -0,0 +1,285 @@
+"""
+Benchmarks for the simulation and rendering hot paths.
+
+Runs the whole step and its move_objects, handle_collisions and
+check_game_over phases, create_objects and Game.draw headlessly over a
+sweep of object counts, sizes and collision coverages, and writes the
+results as JSON that can be compared across commits:
+
+    python rps_benchmark.py --output before.json
+    ... change something ...
+    python rps_benchmark.py --output after.json --compare before.json
+
+Every result has `ticks_per_sec` (calls per second; frames per second for
+draw), frame-time percentiles in milliseconds, and create_objects also
+reports memory per object.
+
+Rendering uses SDL's dummy video driver, so no display is needed. When
+neither NotoColorEmoji.ttf nor its cached atlas is available the sprites
+are plain discs of the same size, which costs the same to scale, rotate
+and blit.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import rps_simulation
+from rps_simulation import (Simulation, Game, DEFAULT_SETTINGS, COLLISION_MODES,
+                            DEFAULT_COLLISION_MODE, emoji_atlas_path, load_ruleset)
+
+DEFAULT_COUNTS = (300, 3000, 30000)
+DEFAULT_SIZES = (10, 20)
+DEFAULT_COVERAGES = (0.5, 1.0)
+DEFAULT_TICKS = 50
+DEFAULT_FRAMES = 30
+DEFAULT_REGRESSION_THRESHOLD = 0.15
+
+class BenchmarkGame(Game):
+    """Game that falls back to placeholder sprites when the emoji font is missing"""
+    def load_master_surfaces(self):
+        if (os.path.exists(rps_simulation.FONT_PATH)
+                or os.path.exists(emoji_atlas_path(self.rules.emojis))):
+            return super().load_master_surfaces()
+        pygame = rps_simulation.pygame
+        surfaces = {}
+        # Stand-in sprites in the species' density map colors
+        for obj_type, color in self.rules.colors.items():
+            surface = pygame.Surface((128, 128), pygame.SRCALPHA)
+            pygame.draw.circle(surface, color, (64, 64), 60)
+            surfaces[obj_type] = surface
+        return surfaces
+
+def percentiles_ms(durations):
+    """Frame time percentiles in milliseconds"""
+    durations = np.asarray(durations) * 1000.0
+    p50, p90, p99 = np.percentile(durations, [50, 90, 99]).tolist()
+    return {'mean': float(durations.mean()), 'p50': p50, 'p90': p90, 'p99': p99,
+            'max': float(durations.max())}
+
+def summarize_timings(durations):
+    total = sum(durations)
+    return {
+        'ticks_per_sec': len(durations) / total if total > 0 else float('inf'),
+        'frame_ms': percentiles_ms(durations)
+    }
+
+def bench_create(settings, repeats=3):
+    """Time create_objects and measure the memory it allocates per object"""
+    durations = []
+    simulation = Simulation(settings, seed=0)
+    for _ in range(repeats):
+        start = time.perf_counter()
+        simulation.create_objects()
+        durations.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    simulation.objects = None
+    simulation.create_objects()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = max(len(simulation.objects), 1)
+    pool_bytes = simulation.objects.nbytes
+    result = summarize_timings(durations)
+    result['memory_per_object'] = {
+        'pool_bytes': pool_bytes / count,
+        'retained_bytes': current / count,
+        'peak_bytes': peak / count
+    }
+    return result
+
+def bench_step(settings, ticks):
+    """
+    Time Simulation.step and each of its phases over `ticks` ticks. The
+    phases are timed by wrapping the simulation's own methods, so sub-steps
+    and anything else step() does are measured as they really run;
+    'update' is move_objects.
+    """
+    simulation = Simulation(settings, seed=0)
+    methods = {'update': 'move_objects', 'handle_collisions': 'handle_collisions',
+               'check_game_over': 'check_game_over'}
+    spent = dict.fromkeys(methods, 0.0)
+    clock = time.perf_counter
+    for phase, name in methods.items():
+        def timed(*args, _method=getattr(simulation, name), _phase=phase, **kwargs):
+            start = clock()
+            result = _method(*args, **kwargs)
+            spent[_phase] += clock() - start
+            return result
+        setattr(simulation, name, timed)
+
+    phases = {phase: [] for phase in [*methods, 'step']}
+    for _ in range(ticks):
+        if simulation.game_over:
+            simulation.reset()
+        for phase in methods:
+            spent[phase] = 0.0
+        start = clock()
+        simulation.step()
+        phases['step'].append(clock() - start)
+        for phase in methods:
+            phases[phase].append(spent[phase])
+    return {name: summarize_timings(durations) for name, durations in phases.items()}
+
+def bench_draw(settings, frames):
+    """Time Game.draw with the dummy SDL video driver"""
+    game = BenchmarkGame(settings, seed=0)
+    try:
+        game.draw()  # warm up the sprite cache
+        durations = []
+        for _ in range(frames):
+            game.step()
+            start = time.perf_counter()
+            game.draw()
+            durations.append(time.perf_counter() - start)
+        return summarize_timings(durations)
+    finally:
+        rps_simulation.pygame.display.quit()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(counts, sizes, coverages, ticks, frames, width, height,
+                   render=True, log=None, collision_mode=DEFAULT_COLLISION_MODE,
+                   rules=DEFAULT_SETTINGS['rules'], substep_travel=None):
+    """Run the whole sweep and return a JSON-serializable report"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    results = []
+
+    def record(name, settings, measurement):
+        entry = {'benchmark': name,
+                 'object_count': settings['object_count'],
+                 'object_size': settings['object_size'],
+                 'collision_coverage': settings['collision_coverage']}
+        entry.update(measurement)
+        results.append(entry)
+        if log:
+            log(f"{name:>18}  n={entry['object_count']:<7} size={entry['object_size']:<3} "
+                f"coverage={entry['collision_coverage']:<4}  "
+                f"{measurement['ticks_per_sec']:10.1f}/s  "
+                f"p50 {measurement['frame_ms']['p50']:8.3f} ms  "
+                f"p99 {measurement['frame_ms']['p99']:8.3f} ms")
+
+    type_count = len(load_ruleset(rules))
+    for count in counts:
+        for size in sizes:
+            base = dict(DEFAULT_SETTINGS, screen_width=width, screen_height=height,
+                        object_count=count - count % type_count, object_size=size,
+                        collision_mode=collision_mode, rules=rules,
+                        max_substep_travel=substep_travel)
+            for coverage in coverages:
+                settings = dict(base, collision_coverage=coverage)
+                for phase, measurement in bench_step(settings, ticks).items():
+                    record(phase, settings, measurement)
+            # Placement and drawing don't depend on the collision coverage
+            settings = dict(base, collision_coverage=coverages[0])
+            record('create_objects', settings, bench_create(settings))
+            if render:
+                record('draw', settings, bench_draw(settings, frames))
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'screen': [width, height],
+            'collision_mode': collision_mode,
+            'rules': rules,
+            'substep_travel': substep_travel,
+            'ticks': ticks,
+            'frames': frames
+        },
+        'results': results
+    }
+
+def result_key(entry):
+    return (entry['benchmark'], entry['object_count'], entry['object_size'],
+            entry['collision_coverage'])
+
+def compare(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """Return (key, old, new) for every benchmark whose median frame time got worse than threshold"""
+    old_results = {result_key(entry): entry for entry in baseline['results']}
+    regressions = []
+    for entry in current['results']:
+        old = old_results.get(result_key(entry))
+        if old is None:
+            continue
+        old_ms = old['frame_ms']['p50']
+        new_ms = entry['frame_ms']['p50']
+        if old_ms > 0 and (new_ms - old_ms) / old_ms > threshold:
+            regressions.append((result_key(entry), old_ms, new_ms))
+    return regressions
+
+def parse_list(cast):
+    def parse(text):
+        return [cast(value) for value in text.split(",") if value]
+    return parse
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation and rendering hot paths")
+    parser.add_argument("--counts", type=parse_list(int), default=list(DEFAULT_COUNTS),
+                        help="comma separated object counts")
+    parser.add_argument("--sizes", type=parse_list(int), default=list(DEFAULT_SIZES),
+                        help="comma separated object sizes")
+    parser.add_argument("--coverages", type=parse_list(float), default=list(DEFAULT_COVERAGES),
+                        help="comma separated collision coverages (0-1)")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="ticks per step benchmark")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="frames per draw benchmark")
+    parser.add_argument("--width", type=int, default=1920, help="screen width")
+    parser.add_argument("--height", type=int, default=1080, help="screen height")
+    parser.add_argument("--collisions", choices=COLLISION_MODES, default=DEFAULT_COLLISION_MODE,
+                        help="collision resolution mode to benchmark")
+    parser.add_argument("--rules", default=DEFAULT_SETTINGS['rules'],
+                        help="ruleset to benchmark (see rps_simulation.py --help)")
+    parser.add_argument("--substep-travel", type=float, default=None, metavar="FRACTION",
+                        help="benchmark sub-stepped ticks (see rps_simulation.py --help)")
+    parser.add_argument("--no-render", action="store_true", help="skip the draw benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="compare against an earlier JSON file and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="allowed slowdown of the median frame time (default 0.15 = 15%%)")
+    args = parser.parse_args()
+
+    # Keep stdout for the JSON report (the game prints warnings and font messages)
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmarks(args.counts, args.sizes, args.coverages, args.ticks, args.frames,
+                                args.width, args.height, render=not args.no_render,
+                                log=lambda line: print(line, file=sys.stderr),
+                                collision_mode=args.collisions, rules=args.rules,
+                                substep_travel=args.substep_travel)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline, report, args.threshold)
+        for (name, count, size, coverage), old_ms, new_ms in regressions:
+            print(f"REGRESSION {name} n={count} size={size} coverage={coverage}: "
+                  f"{old_ms:.3f} ms -> {new_ms:.3f} ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Checkpoints of in-progress simulations, and branching experiments from them.
+
+A checkpoint is the complete state of a Simulation: every ObjectPool field,
+the tick, the result so far, the RNG state and the population history. It
+loads back into an identical simulation, which continues exactly as the
+original would have:
+
+    python rps_simulation.py --headless --seed 7 --checkpoint run.rpsc --checkpoint-interval 5000
+    python rps_simulation.py --headless --resume run.rpsc
+    python rps_checkpoint.py info run.rpsc
+    python rps_checkpoint.py fork run.rpsc --branches 200 --jitter 0.01
+
+`fork` plays N continuations of one checkpoint across all cores. Since the
+simulation is deterministic, every branch first nudges the velocities by a
+small random factor drawn from its own seed, and reports which type wins
+from that mid-game position.
+
+File layout (little endian):
+    magic b"RPSC", uint16 version, uint32 header size, JSON header,
+    then every array as raw bytes at the 64-byte aligned offset the header
+    gives for it, so the file can be memory-mapped and viewed in place
+
+Files are written to a temporary name and renamed, so a crash during a save
+leaves the previous checkpoint intact.
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from rps_simulation import Simulation, ObjectPool, load_ruleset
+from rps_tournament import (DEFAULT_MAX_TICKS, collect_results, play_rounds, round_result,
+                            round_seed, summarize, format_report)
+
+MAGIC = b"RPSC"
+VERSION = 1
+ALIGNMENT = 64
+DEFAULT_CHECKPOINT_INTERVAL = 10000
+# Standard deviation of the relative velocity nudge of a forked branch
+DEFAULT_JITTER = 0.01
+
+PREAMBLE = struct.Struct("<4sHI")
+FIELD_DTYPES = {
+    'x': "<f8",
+    'y': "<f8",
+    'speed_x': "<f8",
+    'speed_y': "<f8",
+    'rotation': "<f8",
+    'rotation_speed': "<f8",
+    'type': "i1",
+    'population': "<i4",
+    # random.Random's Mersenne Twister words plus the position in them
+    'rng_state': "<u4"
+}
+
+class CheckpointError(Exception):
+    """Raised when a checkpoint file is malformed"""
+
+def save_checkpoint(simulation, path):
+    """Write the full state of `simulation` to `path`"""
+    state = simulation.get_state()
+    rng_version, rng_words, gauss_next = state['rng_state']
+    arrays = {name: state[name] for name in ObjectPool.FIELDS}
+    arrays['population'] = state['population']
+    arrays['rng_state'] = np.array(rng_words, dtype=np.uint32)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': FIELD_DTYPES[name], 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = {
+        'settings': simulation.settings,
+        'seed': simulation.seed,
+        'tick': state['tick'],
+        'game_over': state['game_over'],
+        'winner_type': state['winner_type'],
+        'population_start': state['population_start'],
+        'population_peak': state['population_peak'],
+        'peak_tick': state['peak_tick'],
+        'extinction_tick': state['extinction_tick'],
+        'rng_version': rng_version,
+        'rng_gauss_next': gauss_next,
+        'arrays': layout
+    }
+    encoded = json.dumps(header).encode()
+    # Pad the header so the data starts aligned too
+    data_start = -(-(PREAMBLE.size + len(encoded)) // ALIGNMENT) * ALIGNMENT
+    encoded += b" " * (data_start - PREAMBLE.size - len(encoded))
+
+    with open(path + ".tmp", "wb") as checkpoint_file:
+        checkpoint_file.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+        checkpoint_file.write(encoded)
+        for name, array in arrays.items():
+            checkpoint_file.seek(data_start + layout[name]['offset'])
+            checkpoint_file.write(np.ascontiguousarray(array, dtype=FIELD_DTYPES[name]).tobytes())
+        checkpoint_file.truncate(data_start + offset)
+    os.replace(path + ".tmp", path)
+
+def read_checkpoint(path):
+    """(header, arrays) of a checkpoint; the arrays are read-only views of a memory map"""
+    try:
+        with open(path, "rb") as checkpoint_file:
+            magic, version, header_size = PREAMBLE.unpack(checkpoint_file.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise CheckpointError(f"{path} is not a checkpoint file")
+            if version != VERSION:
+                raise CheckpointError(f"unsupported checkpoint version {version}")
+            header = json.loads(checkpoint_file.read(header_size))
+    except (OSError, struct.error, ValueError) as e:
+        raise CheckpointError(f"could not read checkpoint {path}: {e}")
+
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    data_start = PREAMBLE.size + header_size
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        size = int(np.prod(entry['shape'])) * dtype.itemsize
+        start = data_start + entry['offset']
+        if start + size > len(data):
+            raise CheckpointError(f"checkpoint {path} is truncated")
+        arrays[name] = data[start:start + size].view(dtype).reshape(entry['shape'])
+    return header, arrays
+
+def checkpoint_state(header, arrays):
+    """A Simulation.set_state() dict from read_checkpoint() output"""
+    state = {name: arrays[name] for name in ObjectPool.FIELDS}
+    state['tick'] = header['tick']
+    state['game_over'] = header['game_over']
+    state['winner_type'] = header['winner_type']
+    state['rng_state'] = (header['rng_version'], tuple(arrays['rng_state'].tolist()),
+                          header['rng_gauss_next'])
+    state['population'] = arrays['population']
+    state['population_start'] = header['population_start']
+    state['population_peak'] = header['population_peak']
+    state['peak_tick'] = header['peak_tick']
+    state['extinction_tick'] = header['extinction_tick']
+    return state
+
+def load_checkpoint(path, simulation_class=Simulation):
+    """Simulation (or Game, via `simulation_class`) restored from a checkpoint"""
+    header, arrays = read_checkpoint(path)
+    # set_state copies every array out of the memory map in one go
+    return simulation_class(header['settings'], header['seed'], checkpoint_state(header, arrays))
+
+class Checkpointer:
+    """Saves a simulation every `interval` ticks; call record() after every step()"""
+    def __init__(self, path, simulation, interval):
+        self.path = path
+        self.interval = interval
+        save_checkpoint(simulation, path)
+
+    def record(self, simulation):
+        if self.interval and simulation.tick % self.interval == 0:
+            save_checkpoint(simulation, self.path)
+
+    def close(self, simulation=None):
+        """Save the final state, so a finished run can still be inspected or branched"""
+        if simulation is not None:
+            save_checkpoint(simulation, self.path)
+
+def branch(simulation, seed, jitter=DEFAULT_JITTER):
+    """
+    Perturb a restored simulation in place into one continuation: every
+    velocity component is scaled by 1 + jitter * N(0, 1), and the RNG used
+    by later restarts is reseeded, both from `seed`
+    """
+    rng = np.random.default_rng(seed)
+    velocity = simulation.objects.velocity
+    velocity *= 1.0 + jitter * rng.standard_normal(velocity.shape)
+    simulation.rng.seed(seed)
+    return simulation
+
+def _play_branch(job):
+    path, branch_index, seed, jitter, max_ticks = job
+    simulation = branch(load_checkpoint(path), seed, jitter)
+    start_tick = simulation.tick
+    simulation.run(None if max_ticks is None else start_tick + max_ticks)
+    result = round_result(simulation, seed)
+    result['branch'] = branch_index
+    result['start_tick'] = start_tick
+    return result
+
+def iter_branches(path, branches, base_seed=0, jitter=DEFAULT_JITTER, max_ticks=DEFAULT_MAX_TICKS,
+                  workers=None):
+    """
+    Play `branches` continuations of a checkpoint over a process pool,
+    yielding each result as it finishes. Workers memory-map the file
+    themselves, so the state is never pickled. `max_ticks` counts from the
+    checkpoint's tick.
+    """
+    jobs = [(path, index, round_seed(base_seed, index), jitter, max_ticks) for index in range(branches)]
+    return play_rounds(_play_branch, jobs, workers)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a checkpoint or branch experiments from it")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="describe a checkpoint")
+    info.add_argument("checkpoint")
+    fork = commands.add_parser("fork", help="play many perturbed continuations of a checkpoint")
+    fork.add_argument("checkpoint")
+    fork.add_argument("--branches", type=int, default=100, help="number of continuations")
+    fork.add_argument("--jitter", type=float, default=DEFAULT_JITTER,
+                      help=f"relative velocity perturbation of each branch (default {DEFAULT_JITTER})")
+    fork.add_argument("--seed", type=int, default=0, help="base seed of the branch perturbations")
+    fork.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS,
+                      help="branches still running after this many more ticks count as draws")
+    fork.add_argument("--workers", type=int, default=None,
+                      help="worker processes (default: one per core)")
+    fork.add_argument("--results", help="stream per-branch results to this JSON lines file")
+    fork.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        header, arrays = read_checkpoint(args.checkpoint)
+    except CheckpointError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    rules = load_ruleset(header['settings'].get('rules', 'classic'))
+
+    if args.command == "info":
+        counts = np.bincount(arrays['type'], minlength=len(rules)).tolist()
+        print(f"Seed: {header['seed']}, tick: {header['tick']}, objects: {len(arrays['type'])}")
+        print("Population: " + ", ".join(f"{rules.names[obj_type]} {count}"
+                                         for obj_type, count in enumerate(counts)))
+        if header['game_over']:
+            winner = header['winner_type']
+            print(f"Finished: {'stalemate' if winner is None else rules.names[winner]}")
+        return
+
+    results, elapsed = collect_results(
+        iter_branches(args.checkpoint, args.branches, args.seed, args.jitter, args.max_ticks,
+                      args.workers),
+        args.branches, "branches", args.results, quiet=args.json)
+
+    report = summarize(results, rules)
+    report['checkpoint'] = args.checkpoint
+    report['tick'] = header['tick']
+    report['jitter'] = args.jitter
+    report['elapsed'] = elapsed
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(file=sys.stderr)
+        print(f"Branches of tick {header['tick']} with {args.jitter:g} velocity jitter")
+        print(format_report(report))
+        print(f"Finished in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Dashboard mode: many independent battles at once in one tiled window.
+
+Each arena is a headless Simulation in its own worker process. After every
+tick a worker publishes its object positions, rotations and types into a
+shared-memory block. The main process maps all blocks as NumPy arrays and
+draws each arena scaled into its own tile, with its own counters and
+winner banner. No per-object Python structures cross a process boundary.
+
+    python rps_dashboard.py --arenas 9 --objects 150 --size 30
+
+Keys: 1-4 speed for every arena, R restart the finished arenas, ESC quit.
+"""
+import argparse
+import math
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import rps_simulation
+from rps_simulation import (Simulation, SpriteCache, load_emoji_atlas, import_pygame,
+                            SIMULATION_TICK_RATE, SPEED_MULTIPLIERS, DEFAULT_FPS,
+                            WHITE, BLACK, GRAY, LIGHT_GRAY, load_ruleset,
+                            add_settings_arguments, settings_from_args)
+from rps_tournament import round_seed
+
+DEFAULT_ARENAS = 4
+DEFAULT_WINDOW_WIDTH = 1280
+DEFAULT_WINDOW_HEIGHT = 720
+# Workers publish at most this often when running faster than the display
+PUBLISH_INTERVAL = 1.0 / 120
+
+# Header fields of an arena block, followed by one count per species
+SEQUENCE, TICK, GAME_OVER, WINNER, SEED, COUNTS = range(6)
+
+# Control columns, one row per arena, written by the main process
+STOP, RESTART, SPEED = range(3)
+
+class ArenaBuffer:
+    """One arena's published state in shared memory: a header plus x, y, rotation and type"""
+    def __init__(self, count, type_count, name=None):
+        header_size = COUNTS + type_count
+        size = 8 * header_size + count * (3 * 8 + 1)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.count = count
+        buffer = self.shm.buf
+        self.header = np.ndarray(header_size, np.int64, buffer)
+        offset = 8 * header_size
+        self.x = np.ndarray(count, np.float64, buffer, offset)
+        self.y = np.ndarray(count, np.float64, buffer, offset + 8 * count)
+        self.rotation = np.ndarray(count, np.float64, buffer, offset + 16 * count)
+        self.type = np.ndarray(count, np.int8, buffer, offset + 24 * count)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, simulation):
+        """Copy the simulation's state in; readers never see a half-written tick"""
+        header = self.header
+        # Sequence lock: odd while writing
+        header[SEQUENCE] += 1
+        pool = simulation.objects
+        np.copyto(self.x, pool.x)
+        np.copyto(self.y, pool.y)
+        np.copyto(self.rotation, pool.rotation)
+        np.copyto(self.type, pool.type)
+        header[TICK] = simulation.tick
+        header[GAME_OVER] = simulation.game_over
+        header[WINNER] = -1 if simulation.winner_type is None else simulation.winner_type
+        header[SEED] = simulation.seed
+        header[COUNTS:] = simulation.counts
+        header[SEQUENCE] += 1
+
+    def _copy(self):
+        return (self.header.copy(), self.x.copy(), self.y.copy(), self.rotation.copy(),
+                self.type.copy())
+
+    def snapshot(self, retries=100):
+        """Consistent copy of the header and arrays (x, y, rotation, type)"""
+        header = self.header
+        for _ in range(retries):
+            sequence = int(header[SEQUENCE])
+            if sequence % 2 == 0:
+                copy = self._copy()
+                if int(header[SEQUENCE]) == sequence:
+                    return copy
+            time.sleep(0)
+        # The writer kept getting in the way: a torn frame beats no frame
+        return self._copy()
+
+    def close(self):
+        # The views must go before the mapping can be closed
+        del self.header, self.x, self.y, self.rotation, self.type
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+def arena_worker(index, settings, base_seed, arena_count, buffer_name, control_name):
+    """Run one arena until told to stop, publishing every tick to its ArenaBuffer"""
+    control_shm = shared_memory.SharedMemory(name=control_name)
+    control = np.ndarray((arena_count, 3), np.int64, control_shm.buf)
+    generation = 0
+    simulation = Simulation(settings, round_seed(base_seed, index))
+    buffer = ArenaBuffer(len(simulation.objects), len(simulation.rules), buffer_name)
+    buffer.publish(simulation)
+
+    tick_time = 1.0 / SIMULATION_TICK_RATE
+    accumulator = 0.0
+    previous = last_publish = time.perf_counter()
+    try:
+        while not control[index, STOP]:
+            if control[index, RESTART] != generation:
+                generation = int(control[index, RESTART])
+                simulation = Simulation(settings, round_seed(base_seed, index + generation * arena_count))
+                buffer.publish(simulation)
+                accumulator = 0.0
+
+            now = time.perf_counter()
+            frame_time = min(now - previous, rps_simulation.MAX_FRAME_TIME)
+            previous = now
+            if simulation.game_over:
+                time.sleep(0.05)
+                continue
+
+            multiplier = int(control[index, SPEED])
+            if multiplier <= 0:
+                # Maximum speed: step freely, publishing at display rate
+                simulation.step()
+            else:
+                accumulator += frame_time * multiplier
+                while accumulator >= tick_time and not simulation.game_over:
+                    simulation.step()
+                    accumulator -= tick_time
+                if accumulator < tick_time:
+                    time.sleep(max(0.0, tick_time - accumulator) / multiplier)
+
+            now = time.perf_counter()
+            if simulation.game_over or now - last_publish >= PUBLISH_INTERVAL:
+                buffer.publish(simulation)
+                last_publish = now
+    finally:
+        del control
+        buffer.close()
+        control_shm.close()
+
+class Dashboard:
+    """Tiled window showing K arenas that run in worker processes"""
+    def __init__(self, settings, arenas=DEFAULT_ARENAS, seed=0, window_size=None,
+                 auto_restart=None):
+        self.settings = {**rps_simulation.DEFAULT_SETTINGS, **settings}
+        self.arena_count = arenas
+        self.seed = seed
+        self.auto_restart = auto_restart
+        self.rules = load_ruleset(self.settings['rules'])
+        self.object_count = self.settings['object_count'] // len(self.rules) * len(self.rules)
+        self.world_size = (self.settings['world_width'] or self.settings['screen_width'],
+                           self.settings['world_height'] or self.settings['screen_height'])
+
+        self.columns = math.ceil(math.sqrt(arenas))
+        self.rows = math.ceil(arenas / self.columns)
+        window_width, window_height = window_size or (DEFAULT_WINDOW_WIDTH, DEFAULT_WINDOW_HEIGHT)
+        self.tile_width = window_width // self.columns
+        self.tile_height = window_height // self.rows
+        # Same scale on both axes so sprites stay round
+        self.scale = min(self.tile_width / self.world_size[0], self.tile_height / self.world_size[1])
+        self.sprite_size = max(4, round(self.settings['object_size'] * self.scale))
+
+        self.buffers = []
+        self.workers = []
+        self.control_shm = None
+        self.finished_at = {}
+        self.speed_index = 0
+        self.running = True
+
+    def start(self):
+        self.control_shm = shared_memory.SharedMemory(create=True, size=8 * 3 * self.arena_count)
+        self.control = np.ndarray((self.arena_count, 3), np.int64, self.control_shm.buf)
+        self.control[:] = 0
+        self.set_speed(self.speed_index)
+        for index in range(self.arena_count):
+            buffer = ArenaBuffer(self.object_count, len(self.rules))
+            buffer.header[:] = 0
+            buffer.header[WINNER] = -1
+            self.buffers.append(buffer)
+            worker = multiprocessing.Process(
+                target=arena_worker, name=f"arena-{index}", daemon=True,
+                args=(index, self.settings, self.seed, self.arena_count, buffer.name,
+                      self.control_shm.name))
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        if self.control_shm is None:
+            return
+        self.control[:, STOP] = 1
+        for worker in self.workers:
+            worker.join(timeout=2)
+            if worker.is_alive():
+                worker.terminate()
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        del self.control
+        self.control_shm.close()
+        self.control_shm.unlink()
+        self.control_shm = None
+
+    def set_speed(self, speed_index):
+        self.speed_index = speed_index
+        multiplier = SPEED_MULTIPLIERS[speed_index]
+        self.control[:, SPEED] = 0 if multiplier is None else multiplier
+
+    def restart(self, index):
+        self.control[index, RESTART] += 1
+        self.finished_at.pop(index, None)
+
+    def handle_events(self):
+        pygame = rps_simulation.pygame
+        speed_keys = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                elif event.key == pygame.K_r:
+                    for index in list(self.finished_at):
+                        self.restart(index)
+                elif event.key in speed_keys[:len(SPEED_MULTIPLIERS)]:
+                    self.set_speed(speed_keys.index(event.key))
+
+    def draw_tile(self, index, tile):
+        """Draw one arena, its counters and its winner banner onto a tile subsurface"""
+        pygame = rps_simulation.pygame
+        header, xs, ys, rotations, types = self.buffers[index].snapshot()
+        tile.fill(WHITE)
+
+        if header[SEQUENCE]:
+            size = self.sprite_size
+            get_sprite = self.sprites.get
+            blits = []
+            for obj_type, x, y, rotation in zip(types.tolist(), (xs * self.scale).tolist(),
+                                                (ys * self.scale).tolist(), rotations.tolist()):
+                surface, offset_x, offset_y = get_sprite(obj_type, size, rotation)
+                blits.append((surface, (int(x) - offset_x, int(y) - offset_y)))
+            tile.blits(blits, False)
+
+        y_offset = 5
+        for obj_type, count in enumerate(header[COUNTS:].tolist()):
+            tile.blit(self.sprites.get(obj_type, 14)[0], (5, y_offset))
+            text = self.text_font.render(f" {self.rules.names[obj_type]}: {count}", True, BLACK)
+            tile.blit(text, (19, y_offset))
+            y_offset += 16
+        info = self.text_font.render(f"arena {index + 1}  tick {header[TICK]}  seed {header[SEED]}",
+                                     True, GRAY)
+        tile.blit(info, (5, y_offset))
+
+        if header[GAME_OVER]:
+            winner_type = int(header[WINNER])
+            if winner_type < 0:
+                # The survivors can't convert each other
+                text = self.big_font.render("STALEMATE", True, BLACK)
+                text_rect = text.get_rect(center=(tile.get_width() // 2, tile.get_height() // 2))
+                background = text_rect.inflate(20, 12)
+                emoji = None
+            else:
+                text = self.big_font.render(f"WINNER: {self.rules.names[winner_type]}", True, BLACK)
+                text_rect = text.get_rect(center=(tile.get_width() // 2, tile.get_height() // 2))
+                emoji = self.sprites.get(winner_type, 32)[0]
+                emoji_rect = emoji.get_rect(midleft=(text_rect.right + 6, text_rect.centery))
+                background = text_rect.union(emoji_rect).inflate(20, 12)
+            pygame.draw.rect(tile, WHITE, background)
+            pygame.draw.rect(tile, BLACK, background, 2)
+            tile.blit(text, text_rect)
+            if emoji is not None:
+                tile.blit(emoji, emoji_rect)
+            if index not in self.finished_at:
+                self.finished_at[index] = time.perf_counter()
+
+        pygame.draw.rect(tile, LIGHT_GRAY, tile.get_rect(), 1)
+
+    def run(self):
+        pygame = None
+        try:
+            # Workers are forked before SDL starts any threads; stop() also
+            # releases the shared memory of a start that failed halfway
+            self.start()
+            pygame = import_pygame()
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.tile_width * self.columns,
+                                                   self.tile_height * self.rows))
+            pygame.display.set_caption(f"Rock Paper Scissors - {self.arena_count} arenas")
+            self.screen.fill(LIGHT_GRAY)  # unused tiles of the last row
+            clock = pygame.time.Clock()
+            self.text_font = pygame.font.Font(None, 18)
+            self.big_font = pygame.font.Font(None, 32)
+            self.sprites = SpriteCache(load_emoji_atlas(emojis=self.rules.emojis),
+                                       self.settings['sprite_angle_step'],
+                                       self.settings['sprite_cache_mb'] * 1024 * 1024)
+            self.sprites.warm(self.sprite_size)
+            tiles = [self.screen.subsurface(pygame.Rect((index % self.columns) * self.tile_width,
+                                                        (index // self.columns) * self.tile_height,
+                                                        self.tile_width, self.tile_height))
+                     for index in range(self.arena_count)]
+
+            while self.running:
+                self.handle_events()
+                for index, tile in enumerate(tiles):
+                    self.draw_tile(index, tile)
+                if self.auto_restart is not None:
+                    now = time.perf_counter()
+                    for index, finished in list(self.finished_at.items()):
+                        if now - finished >= self.auto_restart:
+                            self.restart(index)
+                pygame.display.flip()
+                clock.tick(DEFAULT_FPS)
+        finally:
+            self.stop()
+            if pygame is not None:
+                pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch many independent battles in one tiled window")
+    parser.add_argument("--arenas", type=int, default=DEFAULT_ARENAS, help="number of arenas")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; every arena gets its own")
+    parser.add_argument("--window-width", type=int, default=DEFAULT_WINDOW_WIDTH, help="window width")
+    parser.add_argument("--window-height", type=int, default=DEFAULT_WINDOW_HEIGHT,
+                        help="window height")
+    parser.add_argument("--auto-restart", type=float, default=None, metavar="SECONDS",
+                        help="restart a finished arena after this many seconds")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    if args.arenas < 1:
+        parser.error("at least one arena is needed")
+
+    dashboard = Dashboard(settings_from_args(parser, args), args.arenas, args.seed,
+                          (args.window_width, args.window_height), args.auto_restart)
+    print("Controls: 1/2/3/4 speed, R restart finished arenas, ESC exit")
+    dashboard.run()
+
+if __name__ == "__main__":
+    main()
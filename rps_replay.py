@@ -0,0 +1,272 @@
+"""
+Compact binary replays of seeded simulations.
+
+A replay stores the settings and seed, a keyframe with the full object
+state every `keyframe_interval` ticks, and in between only the type
+conversions of each tick. Because a simulation is deterministic, any tick
+can be reconstructed by restoring the nearest keyframe and stepping
+forward from there; object types at any tick are available from the
+conversion log alone, without simulating at all.
+
+File layout (little endian):
+    magic b"RPSR", uint16 version, uint32 header size, JSON header
+    chunks: uint8 tag, uint32 tick, uint32 payload size, payload
+        b"K" keyframe:    game_over uint8, winner int8, then every
+                          ObjectPool field as a raw array
+        b"C" conversions: uint32 object indices, then uint8 new types
+        b"E" end:         game_over uint8, winner int8
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+from rps_simulation import Simulation, DEFAULT_SETTINGS, load_ruleset
+
+MAGIC = b"RPSR"
+VERSION = 1
+DEFAULT_KEYFRAME_INTERVAL = 1000
+
+KEYFRAME = b"K"
+CONVERSIONS = b"C"
+END = b"E"
+
+PREAMBLE = struct.Struct("<4sHI")
+CHUNK = struct.Struct("<cII")
+FLAGS = struct.Struct("<Bb")
+FIELD_DTYPES = {
+    'x': np.float64,
+    'y': np.float64,
+    'speed_x': np.float64,
+    'speed_y': np.float64,
+    'rotation': np.float64,
+    'rotation_speed': np.float64,
+    'type': np.int8
+}
+
+class ReplayError(Exception):
+    """Raised when a replay file is malformed or does not match its simulation"""
+
+class ReplayWriter:
+    """Records a simulation as it is stepped; call record() after every step()"""
+    def __init__(self, path, simulation, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.file = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        header = json.dumps({
+            'settings': simulation.settings,
+            'seed': simulation.seed,
+            'object_count': len(simulation.objects),
+            'keyframe_interval': keyframe_interval
+        }).encode()
+        self.file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        self.file.write(header)
+        self.write_keyframe(simulation)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_chunk(self, tag, tick, payload):
+        self.file.write(CHUNK.pack(tag, tick, len(payload)))
+        self.file.write(payload)
+
+    def write_keyframe(self, simulation):
+        winner = -1 if simulation.winner_type is None else simulation.winner_type
+        parts = [FLAGS.pack(simulation.game_over, winner)]
+        for name, array in simulation.objects.arrays().items():
+            parts.append(np.ascontiguousarray(array, dtype=FIELD_DTYPES[name]).tobytes())
+        self._write_chunk(KEYFRAME, simulation.tick, b"".join(parts))
+
+    def record(self, simulation):
+        """Log the conversions of the tick that was just stepped"""
+        if simulation.conversions:
+            indices, new_types, _ = zip(*simulation.conversions)
+            payload = (np.array(indices, dtype="<u4").tobytes()
+                       + np.array(new_types, dtype=np.uint8).tobytes())
+            self._write_chunk(CONVERSIONS, simulation.tick, payload)
+        if simulation.tick % self.keyframe_interval == 0 or simulation.game_over:
+            self.write_keyframe(simulation)
+
+    def close(self, simulation=None):
+        """Finish the file; pass the simulation to mark the final result"""
+        if self.file.closed:
+            return
+        if simulation is not None:
+            winner = -1 if simulation.winner_type is None else simulation.winner_type
+            self._write_chunk(END, simulation.tick, FLAGS.pack(simulation.game_over, winner))
+        self.file.close()
+
+class ReplayPlayer:
+    """Random access to a replay file through its keyframes"""
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        magic, version, header_size = PREAMBLE.unpack(self.file.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ReplayError(f"{path} is not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        header = json.loads(self.file.read(header_size))
+        self.settings = header['settings']
+        self.rules = load_ruleset({**DEFAULT_SETTINGS, **self.settings}['rules'])
+        self.seed = header['seed']
+        self.object_count = header['object_count']
+        self.keyframe_interval = header['keyframe_interval']
+
+        # One pass over the chunk headers; payloads are only read on demand.
+        # An interrupted recording can end in a partly written chunk, which
+        # is dropped along with anything after it.
+        file_size = os.fstat(self.file.fileno()).st_size
+        self.keyframes = []
+        self.last_tick = 0
+        self.winner_type = None
+        # finished: the recording was closed normally; game_over: the round
+        # itself ended rather than being stopped early
+        self.finished = False
+        self.game_over = False
+        while True:
+            offset = self.file.tell()
+            chunk = self.file.read(CHUNK.size)
+            if len(chunk) < CHUNK.size:
+                break
+            tag, tick, size = CHUNK.unpack(chunk)
+            if offset + CHUNK.size + size > file_size:
+                break
+            if tag == KEYFRAME:
+                self.keyframes.append((tick, offset))
+            elif tag == END:
+                game_over, winner = FLAGS.unpack(self.file.read(FLAGS.size))
+                self.winner_type = None if winner < 0 else winner
+                self.game_over = bool(game_over)
+                self.finished = True
+                size -= FLAGS.size
+            self.last_tick = max(self.last_tick, tick)
+            self.file.seek(size, 1)
+        if not self.keyframes:
+            raise ReplayError(f"{path} has no initial state")
+        self.keyframe_ticks = [tick for tick, _ in self.keyframes]
+        # Recordings of a resumed checkpoint start later than tick 0
+        self.first_tick = self.keyframe_ticks[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def _read_chunk(self, offset=None):
+        if offset is not None:
+            self.file.seek(offset)
+        chunk = self.file.read(CHUNK.size)
+        if len(chunk) < CHUNK.size:
+            return None
+        tag, tick, size = CHUNK.unpack(chunk)
+        payload = self.file.read(size)
+        if len(payload) < size:
+            return None
+        return tag, tick, payload
+
+    def _decode_keyframe(self, tick, payload):
+        game_over, winner = FLAGS.unpack_from(payload)
+        state = {'tick': tick, 'game_over': bool(game_over),
+                 'winner_type': None if winner < 0 else winner}
+        offset = FLAGS.size
+        for name, dtype in FIELD_DTYPES.items():
+            array = np.frombuffer(payload, dtype=dtype, count=self.object_count, offset=offset)
+            state[name] = array.copy()
+            offset += array.nbytes
+        return state
+
+    def _decode_conversions(self, payload):
+        count = len(payload) // 5
+        indices = np.frombuffer(payload, dtype="<u4", count=count)
+        new_types = np.frombuffer(payload, dtype=np.uint8, count=count, offset=count * 4)
+        return indices, new_types
+
+    def keyframe_before(self, tick):
+        """State of the last keyframe at or before `tick`"""
+        position = int(np.searchsorted(self.keyframe_ticks, tick, side="right")) - 1
+        keyframe_tick, offset = self.keyframes[max(position, 0)]
+        tag, _, payload = self._read_chunk(offset)
+        return self._decode_keyframe(keyframe_tick, payload)
+
+    def conversions(self, start=0, stop=None):
+        """Yield (tick, indices, new_types) for every tick in [start, stop) with conversions"""
+        stop = self.last_tick + 1 if stop is None else stop
+        position = int(np.searchsorted(self.keyframe_ticks, start, side="right")) - 1
+        self.file.seek(self.keyframes[max(position, 0)][1])
+        while True:
+            chunk = self._read_chunk()
+            if chunk is None:
+                return
+            tag, tick, payload = chunk
+            if tick >= stop:
+                return
+            if tag == CONVERSIONS and tick >= start:
+                indices, new_types = self._decode_conversions(payload)
+                yield tick, indices, new_types
+
+    def check_tick(self, tick):
+        """Raise ReplayError unless the recording covers `tick`"""
+        if not self.first_tick <= tick <= self.last_tick:
+            raise ReplayError(f"replay covers ticks {self.first_tick} to {self.last_tick}")
+    
+    def types_at(self, tick):
+        """Object types after `tick`, from the nearest keyframe plus the conversion log"""
+        self.check_tick(tick)
+        state = self.keyframe_before(tick)
+        types = state['type']
+        for _, indices, new_types in self.conversions(state['tick'] + 1, tick + 1):
+            types[indices] = new_types
+        return types
+
+    def seek(self, tick):
+        """Simulation restored to the exact state after `tick`"""
+        self.check_tick(tick)
+        simulation = Simulation(self.settings, self.seed, self.keyframe_before(tick))
+        while simulation.tick < tick and not simulation.game_over:
+            simulation.step()
+        return simulation
+
+    def counts_at(self, tick):
+        """Population of every type after `tick`"""
+        return np.bincount(self.types_at(tick), minlength=len(self.rules))
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect a replay file")
+    parser.add_argument("replay", help="replay file written with --replay")
+    parser.add_argument("--tick", type=int, action="append", default=[],
+                        help="print the population at this tick (repeatable)")
+    args = parser.parse_args()
+
+    with ReplayPlayer(args.replay) as player:
+        print(f"Seed: {player.seed}")
+        ticks = (f"{player.first_tick}-{player.last_tick}" if player.first_tick
+                 else f"{player.last_tick}")
+        print(f"Objects: {player.object_count}, ticks: {ticks}, "
+              f"keyframes: {len(player.keyframes)}")
+        if player.game_over:
+            winner = "stalemate" if player.winner_type is None else player.rules.names[player.winner_type]
+            print(f"Finished: {winner}")
+        elif player.finished:
+            print(f"Recording stopped at tick {player.last_tick} before the round ended")
+        else:
+            print("Replay is incomplete (recording was interrupted)")
+        for tick in args.tick:
+            if not player.first_tick <= tick <= player.last_tick:
+                print(f"Tick {tick}: out of range", file=sys.stderr)
+                continue
+            counts = player.counts_at(tick)
+            summary = ", ".join(f"{player.rules.names[obj_type]} {count}"
+                                for obj_type, count in enumerate(counts.tolist()))
+            print(f"Tick {tick}: {summary}")
+
+if __name__ == "__main__":
+    main()
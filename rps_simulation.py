@@ -1,10 +1,20 @@
-import pygame
+import argparse
+from collections import OrderedDict
+import functools
+import hashlib
+import json
+import numpy as np
 import random
 import math
 import os
-import urllib.request
-import tkinter as tk
-from tkinter import messagebox, simpledialog
+import sys
+import time
+
+# pygame and tkinter are imported on first use (see import_pygame and
+# import_tkinter), so headless simulations never load them
+pygame = None
+tk = None
+messagebox = None
 
 # Default settings
 DEFAULT_SCREEN_WIDTH = 800
@@ -14,6 +24,80 @@ DEFAULT_OBJECT_COUNT = 60
 DEFAULT_OBJECT_SIZE = 35  
 DEFAULT_SPEED_MIN = 1
 DEFAULT_SPEED_MAX = 3
+DEFAULT_COLLISION_COVERAGE = 1.0
+# 'sequential' resolves colliding pairs one by one in index order (the
+# original behaviour); 'batched' resolves all of a tick's pairs at once
+COLLISION_MODES = ('sequential', 'batched')
+DEFAULT_COLLISION_MODE = 'sequential'
+# With sub-stepping on, a tick is split so that no object travels more than
+# this fraction of the collision distance per sub-step
+DEFAULT_SUBSTEP_TRAVEL = 0.5
+MAX_SUBSTEPS = 32
+MAX_OBJECT_COUNT = 10000
+# Above this many objects the sequential resolver can no longer keep up with
+# 60 FPS, so the settings dialog suggests the batched one
+SEQUENTIAL_SMOOTH_COUNT = 2000
+# Largest world the settings dialog offers, in screens per side
+MAX_WORLD_SCALE = 10
+# Simulation ticks per second at 1x speed (one tick per frame, as before)
+SIMULATION_TICK_RATE = DEFAULT_FPS
+# Fast-forward multipliers selected with keys 1-4; None runs as fast as possible
+SPEED_MULTIPLIERS = (1, 4, 16, None)
+# Share of each frame that may be spent simulating before drawing
+SIMULATION_FRAME_BUDGET = 0.75
+# While the simulation is behind, up to this many frames in a row are not
+# drawn so it can catch up; only after that is the backlog dropped
+MAX_SKIPPED_FRAMES = 4
+# Longer pauses (e.g. dragging the window) are not caught up on
+MAX_FRAME_TIME = 0.25
+# Frames kept by the profiler overlay (F3)
+DEFAULT_PROFILER_FRAMES = 600
+# Camera limits and keyboard pan speed for worlds larger than the window
+MAX_ZOOM = 8.0
+ZOOM_STEP = 1.25
+CAMERA_PAN_SPEED = 800  # screen pixels per second
+DEFAULT_SPRITE_ANGLE_STEP = 3  # degrees between cached sprite rotations
+DEFAULT_SPRITE_CACHE_MB = 64
+FONT_PATH = "NotoColorEmoji.ttf"
+# The emoji are rasterized once at this size into a cached atlas; every
+# sprite is scaled from these masters
+MASTER_FONT_SIZE = 128
+EMOJI_ATLAS_PATH = "rps_emoji_atlas.png"
+EMOJI_ATLAS_VERSION = 1
+# Dirty-rect frames covering more than this share of the screen are flipped whole
+DEFAULT_DIRTY_RECT_THRESHOLD = 0.5
+# Level of detail: above this many visible objects per 100x100 screen
+# pixels, or below LOD_MIN_SPRITE_SIZE pixels per sprite, objects are drawn
+# as a density map of LOD_CELL_SIZE pixel cells instead of one sprite each
+DEFAULT_LOD_DENSITY = 25
+LOD_MIN_SPRITE_SIZE = 6
+LOD_CELL_SIZE = 4
+
+DEFAULT_SETTINGS = {
+    'screen_width': DEFAULT_SCREEN_WIDTH,
+    'screen_height': DEFAULT_SCREEN_HEIGHT,
+    # The world objects move in; None means the same size as the screen
+    'world_width': None,
+    'world_height': None,
+    'object_count': DEFAULT_OBJECT_COUNT,
+    'object_size': DEFAULT_OBJECT_SIZE,
+    'speed_min': DEFAULT_SPEED_MIN,
+    'speed_max': DEFAULT_SPEED_MAX,
+    'collision_coverage': DEFAULT_COLLISION_COVERAGE,
+    'collision_mode': DEFAULT_COLLISION_MODE,
+    # None moves every object by its whole velocity at once (see DEFAULT_SUBSTEP_TRAVEL)
+    'max_substep_travel': None,
+    'sprite_angle_step': DEFAULT_SPRITE_ANGLE_STEP,
+    'sprite_cache_mb': DEFAULT_SPRITE_CACHE_MB,
+    'dirty_rects': True,
+    'dirty_rect_threshold': DEFAULT_DIRTY_RECT_THRESHOLD,
+    # None always draws sprites
+    'lod_density': DEFAULT_LOD_DENSITY,
+    # Ticks of per-type counts kept in memory; None keeps the whole round
+    'population_history': None,
+    # Built-in ruleset name, "cyclic-N" or path to a JSON ruleset (see load_ruleset)
+    'rules': 'classic'
+}
 
 # Colors
 WHITE = (255, 255, 255)
@@ -26,6 +110,17 @@ ROCK = 0
 PAPER = 1
 SCISSORS = 2
 
+# Which type each type defeats
+BEATS = {
+    ROCK: SCISSORS,
+    SCISSORS: PAPER,
+    PAPER: ROCK
+}
+
+# BEATS as a lookup table: BEATS_MATRIX[a, b] is True when type a beats type b
+BEATS_MATRIX = np.zeros((len(BEATS), len(BEATS)), dtype=bool)
+BEATS_MATRIX[list(BEATS.keys()), list(BEATS.values())] = True
+
 # Unicode emojis
 EMOJIS = {
     ROCK: "🪨",
@@ -33,6 +128,13 @@ EMOJIS = {
     SCISSORS: "✂️"
 }
 
+# Density map colors
+TYPE_COLORS = {
+    ROCK: (120, 120, 120),
+    PAPER: (66, 133, 244),
+    SCISSORS: (219, 68, 55)
+}
+
 # Text labels
 OBJECT_NAMES = {
     ROCK: "ROCK",
@@ -40,13 +142,166 @@ OBJECT_NAMES = {
     SCISSORS: "SCISSORS"
 }
 
+class Ruleset:
+    """
+    Species and who beats whom. `beats[a][b]` is True when type a converts
+    type b on contact; species that don't beat each other just bounce. The
+    constants above describe the classic ruleset.
+    """
+    def __init__(self, name, names, emojis, colors, beats):
+        self.name = name
+        self.names = dict(enumerate(names))
+        self.emojis = dict(enumerate(emojis))
+        self.colors = dict(enumerate(tuple(color) for color in colors))
+        self.beats_matrix = np.array(beats, dtype=bool)
+        count = len(self.names)
+        if not 2 <= count <= 127:
+            raise ValueError(f"ruleset {name!r} needs 2 to 127 species, not {count}")
+        if len(self.emojis) != count or len(self.colors) != count or self.beats_matrix.shape != (count, count):
+            raise ValueError(f"ruleset {name!r} needs a name, emoji, color and beats row per species")
+        if self.beats_matrix.diagonal().any():
+            raise ValueError(f"a species beats itself in ruleset {name!r}")
+        if (self.beats_matrix & self.beats_matrix.T).any():
+            raise ValueError(f"two species beat each other in ruleset {name!r}")
+        # Nested lists for the scalar collision loop, where indexing them is
+        # cheaper than indexing the array
+        self.beats = self.beats_matrix.tolist()
+        # With a winner for every pair, only a single survivor ends a round
+        self.has_ties = not (self.beats_matrix | self.beats_matrix.T | np.eye(count, dtype=bool)).all()
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def can_convert(self, types):
+        """Whether any of `types` beats another one of them"""
+        types = list(types)
+        return bool(self.beats_matrix[np.ix_(types, types)].any())
+    
+    @classmethod
+    def from_config(cls, config, name=None):
+        """
+        Build a ruleset from a dict like
+        {"name": ..., "species": [{"name": "ROCK", "emoji": "🪨",
+         "color": [120, 120, 120], "beats": ["SCISSORS"]}, ...]}
+        """
+        label = config.get('name', name) if isinstance(config, dict) else name
+        try:
+            species = config['species']
+            names = [entry['name'] for entry in species]
+            index = {species_name: obj_type for obj_type, species_name in enumerate(names)}
+            if len(index) != len(names):
+                raise ValueError("species names must be unique")
+            beats = np.zeros((len(names), len(names)), dtype=bool)
+            for obj_type, entry in enumerate(species):
+                for beaten in entry.get('beats', ()):
+                    beats[obj_type, index[beaten]] = True
+            return cls(label, names, [entry['emoji'] for entry in species],
+                       [entry['color'] for entry in species], beats)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"malformed ruleset {label!r}: {e!r}")
+
+# Species of the cyclic-N rulesets, in cycle order
+CYCLIC_SPECIES = (
+    ("RED", "🔴", (219, 68, 55)),
+    ("ORANGE", "🟠", (245, 140, 30)),
+    ("YELLOW", "🟡", (240, 200, 30)),
+    ("GREEN", "🟢", (60, 170, 80)),
+    ("BLUE", "🔵", (66, 133, 244)),
+    ("PURPLE", "🟣", (150, 80, 200)),
+    ("BROWN", "🟤", (140, 90, 50)),
+    ("BLACK", "⚫", (40, 40, 40)),
+    ("WHITE", "⚪", (190, 190, 190))
+)
+
+@functools.lru_cache(maxsize=None)
+def cyclic_ruleset(count):
+    """
+    Each species beats the next (count - 1) // 2 in the cycle, so every pair
+    has a winner when `count` is odd (3 is rock paper scissors). With an even
+    count, species half the cycle apart don't interact.
+    """
+    if not 3 <= count <= len(CYCLIC_SPECIES):
+        raise ValueError(f"cyclic rulesets have 3 to {len(CYCLIC_SPECIES)} species, not {count}")
+    names, emojis, colors = zip(*CYCLIC_SPECIES[:count])
+    distance = (np.arange(count)[None, :] - np.arange(count)[:, None]) % count
+    beats = (distance >= 1) & (distance <= (count - 1) // 2)
+    return Ruleset(f"cyclic-{count}", names, emojis, colors, beats)
+
+RULESETS = {
+    'classic': Ruleset('classic', OBJECT_NAMES.values(), EMOJIS.values(), TYPE_COLORS.values(),
+                       BEATS_MATRIX),
+    # Each species beats two others: scissors cuts paper, paper covers rock,
+    # rock crushes lizard, lizard poisons Spock, Spock smashes scissors,
+    # scissors decapitates lizard, lizard eats paper, paper disproves Spock,
+    # Spock vaporizes rock, rock crushes scissors
+    'rpsls': Ruleset.from_config({
+        'name': 'rpsls',
+        'species': [
+            {'name': "ROCK", 'emoji': "🪨", 'color': (120, 120, 120), 'beats': ["SCISSORS", "LIZARD"]},
+            {'name': "PAPER", 'emoji': "📄", 'color': (66, 133, 244), 'beats': ["ROCK", "SPOCK"]},
+            {'name': "SCISSORS", 'emoji': "✂️", 'color': (219, 68, 55), 'beats': ["PAPER", "LIZARD"]},
+            {'name': "LIZARD", 'emoji': "🦎", 'color': (60, 170, 80), 'beats': ["PAPER", "SPOCK"]},
+            {'name': "SPOCK", 'emoji': "🖖", 'color': (150, 80, 200), 'beats': ["ROCK", "SCISSORS"]}
+        ]
+    })
+}
+
+def load_ruleset(spec):
+    """
+    Ruleset for a 'rules' setting: a name from RULESETS, "cyclic-N", or the
+    path of a JSON file in the Ruleset.from_config format
+    """
+    if spec in RULESETS:
+        return RULESETS[spec]
+    if spec.startswith("cyclic-") and spec[len("cyclic-"):].isdigit():
+        return cyclic_ruleset(int(spec[len("cyclic-"):]))
+    try:
+        stat = os.stat(spec)
+    except OSError as e:
+        raise ValueError(f"unknown ruleset {spec!r}: not one of {', '.join(RULESETS)}, "
+                         f"cyclic-N or a readable JSON file ({e})")
+    # Keyed on the modification time too, so an edited file is read again
+    return read_ruleset_file(spec, stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=None)
+def read_ruleset_file(path, mtime_ns, size):
+    """Ruleset from a JSON file; mtime_ns and size only key the cache"""
+    try:
+        with open(path, encoding="utf-8") as rules_file:
+            config = json.load(rules_file)
+    except OSError as e:
+        raise ValueError(f"unknown ruleset {path!r}: not one of {', '.join(RULESETS)}, "
+                         f"cyclic-N or a readable JSON file ({e})")
+    except ValueError as e:
+        raise ValueError(f"ruleset file {path!r} is not valid JSON: {e}")
+    return Ruleset.from_config(config, os.path.splitext(os.path.basename(path))[0])
+
+def import_pygame():
+    """Import pygame the first time something needs to draw"""
+    global pygame
+    if pygame is None:
+        import pygame as pygame_module
+        pygame = pygame_module
+    return pygame
+
+def import_tkinter():
+    """Import tkinter the first time the settings dialog is opened"""
+    global tk, messagebox
+    if tk is None:
+        import tkinter as tk_module
+        from tkinter import messagebox as messagebox_module
+        tk = tk_module
+        messagebox = messagebox_module
+    return tk
+
 def download_emoji_font():
     """Download Noto Color Emoji font if not exists"""
-    font_path = "NotoColorEmoji.ttf"
+    font_path = FONT_PATH
     
     if not os.path.exists(font_path):
         print("Downloading emoji font...")
         try:
+            import urllib.request
             url = "https://github.com/googlefonts/noto-emoji/raw/main/fonts/NotoColorEmoji.ttf"
             urllib.request.urlretrieve(url, font_path)
             print("Font downloaded successfully!")
@@ -58,6 +313,7 @@ def download_emoji_font():
 
 def get_emoji_font(size=30): 
     """Get emoji font, trying multiple fallback options"""
+    import_pygame()
     # Try to download/use Noto Color Emoji
     font_path = download_emoji_font()
     if font_path and os.path.exists(font_path):
@@ -89,14 +345,13 @@ def get_emoji_font(size=30):
     # Last fallback - default font
     return pygame.font.Font(None, size)
 
-def load_font(size):
+def load_font(size, font_path=FONT_PATH):
     """
     Loads the font directly from the local file.
     Exits with a clear error message if the font is missing.
     This is the most reliable, offline, and cross-platform method.
     """
-    # Note: This requires 'os' and 'sys' to be imported at the top of your script.
-    font_path = "NotoColorEmoji.ttf"
+    import_pygame()
     
     if not os.path.exists(font_path):
         print("---------------------------------------------------------")
@@ -114,11 +369,120 @@ def load_font(size):
         print("---------------------------------------------------------")
         sys.exit(1) # Stop the program
 
+def font_fingerprint(font_path, cached=None):
+    """SHA-256 of a font file; the cached hash is reused while its size and mtime match"""
+    stat = os.stat(font_path)
+    if (cached and cached.get('size') == stat.st_size
+            and cached.get('mtime_ns') == stat.st_mtime_ns):
+        return cached
+    digest = hashlib.sha256()
+    with open(font_path, "rb") as font_file:
+        for block in iter(lambda: font_file.read(1 << 20), b""):
+            digest.update(block)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+def emoji_atlas_path(emojis=EMOJIS):
+    """Atlas file for a set of emoji; rulesets other than the classic one get their own"""
+    if emojis == EMOJIS:
+        return EMOJI_ATLAS_PATH
+    digest = hashlib.sha1("".join(emojis[obj_type] for obj_type in sorted(emojis)).encode()).hexdigest()
+    root, extension = os.path.splitext(EMOJI_ATLAS_PATH)
+    return f"{root}_{digest[:12]}{extension}"
+
+def emoji_atlas_paths(atlas_path=EMOJI_ATLAS_PATH):
+    """The atlas image and its JSON metadata file"""
+    return atlas_path, os.path.splitext(atlas_path)[0] + ".json"
+
+def read_emoji_atlas_meta(meta_path, font_size, emojis=EMOJIS):
+    """Atlas metadata if it was built by this version for these emoji at this size"""
+    try:
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+    if (meta.get('version') != EMOJI_ATLAS_VERSION or meta.get('font_size') != font_size
+            or meta.get('emojis') != [emojis[obj_type] for obj_type in sorted(emojis)]):
+        return None
+    return meta
+
+def build_emoji_atlas(font_path=FONT_PATH, atlas_path=None, font_size=MASTER_FONT_SIZE, emojis=EMOJIS):
+    """Rasterize every emoji from the font and save them side by side as a PNG atlas"""
+    import_pygame()
+    image_path, meta_path = emoji_atlas_paths(atlas_path or emoji_atlas_path(emojis))
+    print("Loading local emoji font...")
+    font = load_font(font_size, font_path)
+    surfaces = {obj_type: font.render(emojis[obj_type], True, BLACK) for obj_type in sorted(emojis)}
+    
+    width = sum(surface.get_width() for surface in surfaces.values())
+    height = max(surface.get_height() for surface in surfaces.values())
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+    rects = []
+    x = 0
+    for surface in surfaces.values():
+        rects.append([x, 0, surface.get_width(), surface.get_height()])
+        atlas.blit(surface, (x, 0))
+        x += surface.get_width()
+    
+    meta = {
+        'version': EMOJI_ATLAS_VERSION,
+        'font': font_fingerprint(font_path),
+        'font_size': font_size,
+        'emojis': [emojis[obj_type] for obj_type in sorted(emojis)],
+        'rects': rects
+    }
+    # Write to temporary files first so an interrupted save never leaves a
+    # half-written atlas behind
+    root, extension = os.path.splitext(image_path)
+    try:
+        pygame.image.save(atlas, root + ".tmp" + extension)
+        os.replace(root + ".tmp" + extension, image_path)
+        with open(meta_path + ".tmp", "w") as meta_file:
+            json.dump(meta, meta_file, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+    except (OSError, pygame.error) as e:
+        print(f"Warning: could not cache the emoji atlas: {e}")
+    return surfaces
+
+def load_emoji_atlas(font_path=FONT_PATH, atlas_path=None, font_size=MASTER_FONT_SIZE, emojis=EMOJIS):
+    """
+    Master emoji surfaces by type. They come from the cached atlas while it
+    matches the font (by hash) and size, so the TTF is only parsed when the
+    atlas has to be rebuilt. A missing font is fine as long as the atlas exists.
+    """
+    import_pygame()
+    atlas_path = atlas_path or emoji_atlas_path(emojis)
+    image_path, meta_path = emoji_atlas_paths(atlas_path)
+    meta = read_emoji_atlas_meta(meta_path, font_size, emojis)
+    if meta is not None and os.path.exists(image_path):
+        valid = True
+        if os.path.exists(font_path):
+            fingerprint = font_fingerprint(font_path, meta['font'])
+            valid = fingerprint['sha256'] == meta['font']['sha256']
+            if valid and fingerprint is not meta['font']:
+                # Same font with a new mtime (e.g. copied): remember the new stat
+                meta['font'] = fingerprint
+                try:
+                    with open(meta_path, "w") as meta_file:
+                        json.dump(meta, meta_file, indent=2)
+                except OSError:
+                    pass
+        if valid:
+            try:
+                atlas = pygame.image.load(image_path)
+            except pygame.error:
+                atlas = None
+            if atlas is not None:
+                if pygame.display.get_surface() is not None:
+                    atlas = atlas.convert_alpha()
+                return {obj_type: atlas.subsurface(pygame.Rect(rect)).copy()
+                        for obj_type, rect in zip(sorted(emojis), meta['rects'])}
+    return build_emoji_atlas(font_path, atlas_path, font_size, emojis)
+
 class SettingsDialog:
     def __init__(self):
+        import_tkinter()
         self.root = tk.Tk()
         self.root.title("Game Settings")
-        self.root.geometry("450x950")
         self.root.resizable(False, False)
         
         # Force window to front and make it stay on top temporarily
@@ -126,18 +490,20 @@ class SettingsDialog:
         self.root.focus_force()
         self.root.grab_set()  
         
-        # Center the window
-        self.root.update_idletasks()
-        x = (self.root.winfo_screenwidth() // 2) - (450 // 2)
-        y = (self.root.winfo_screenheight() // 2) - (950 // 2)
-        self.root.geometry(f"450x950+{x}+{y}")
-        
         # Set background color
         self.root.configure(bg='#f0f0f0')
         
         self.settings = {}
         self.create_widgets()
         
+        # Size the window to its widgets and center it
+        self.root.update_idletasks()
+        width = self.root.winfo_reqwidth()
+        height = self.root.winfo_reqheight()
+        x = max(0, (self.root.winfo_screenwidth() - width) // 2)
+        y = max(0, (self.root.winfo_screenheight() - height) // 2)
+        self.root.geometry(f"{width}x{height}+{x}+{y}")
+        
     def create_widgets(self):        
         # Title with background
         title_frame = tk.Frame(self.root, bg='#2196F3', height=60)
@@ -152,8 +518,16 @@ class SettingsDialog:
         main_frame = tk.Frame(self.root, bg='#f0f0f0')
         main_frame.pack(fill='both', expand=True, padx=20)
         
+        # Two columns of settings keep the window short enough for small screens
+        columns = tk.Frame(main_frame, bg='#f0f0f0')
+        columns.pack(fill="x")
+        left_column = tk.Frame(columns, bg='#f0f0f0')
+        left_column.pack(side="left", fill="both", expand=True, padx=(0, 10))
+        right_column = tk.Frame(columns, bg='#f0f0f0')
+        right_column.pack(side="left", fill="both", expand=True, padx=(10, 0))
+        
         # Screen dimensions
-        screen_frame = tk.LabelFrame(main_frame, text="Screen Dimensions", 
+        screen_frame = tk.LabelFrame(left_column, text="Screen Dimensions", 
                                    font=("Arial", 12, "bold"), padx=15, pady=15, bg='#f0f0f0')
         screen_frame.pack(pady=10, fill="x")
         
@@ -169,14 +543,20 @@ class SettingsDialog:
                                 textvariable=self.height_var, font=("Arial", 11))
         height_spin.grid(row=1, column=1, padx=10, pady=8)
         
+        tk.Label(screen_frame, text="World Size (x screen):", font=("Arial", 11), bg='#f0f0f0').grid(row=2, column=0, padx=10, pady=8, sticky="w")
+        self.world_scale_var = tk.IntVar(value=1)
+        world_spin = tk.Spinbox(screen_frame, from_=1, to=MAX_WORLD_SCALE, width=12,
+                                textvariable=self.world_scale_var, font=("Arial", 11))
+        world_spin.grid(row=2, column=1, padx=10, pady=8)
+        
         # Object settings
-        object_frame = tk.LabelFrame(main_frame, text="Object Settings", 
+        object_frame = tk.LabelFrame(left_column, text="Object Settings", 
                                    font=("Arial", 12, "bold"), padx=15, pady=15, bg='#f0f0f0')
         object_frame.pack(pady=10, fill="x")
         
         tk.Label(object_frame, text="Total Objects:", font=("Arial", 11), bg='#f0f0f0').grid(row=0, column=0, padx=10, pady=8, sticky="w")
         self.count_var = tk.IntVar(value=DEFAULT_OBJECT_COUNT)
-        count_spin = tk.Spinbox(object_frame, from_=12, to=300, width=12, 
+        count_spin = tk.Spinbox(object_frame, from_=12, to=MAX_OBJECT_COUNT, width=12, 
                                textvariable=self.count_var, font=("Arial", 11))
         count_spin.grid(row=0, column=1, padx=10, pady=8)
         
@@ -186,13 +566,20 @@ class SettingsDialog:
                               textvariable=self.size_var, font=("Arial", 11))
         size_spin.grid(row=1, column=1, padx=10, pady=8)
         
+        tk.Label(object_frame, text="Rules:", font=("Arial", 11), bg='#f0f0f0').grid(row=2, column=0, padx=10, pady=8, sticky="w")
+        self.rules_var = tk.StringVar(value=DEFAULT_SETTINGS['rules'])
+        rule_names = list(RULESETS) + [f"cyclic-{count}" for count in range(3, len(CYCLIC_SPECIES) + 1)]
+        rules_menu = tk.OptionMenu(object_frame, self.rules_var, *rule_names)
+        rules_menu.config(width=10, font=("Arial", 11))
+        rules_menu.grid(row=2, column=1, padx=10, pady=8)
+        
         # Collision settings
-        collision_frame = tk.LabelFrame(main_frame, text="Collision Settings", 
+        collision_frame = tk.LabelFrame(right_column, text="Collision Settings", 
                                       font=("Arial", 12, "bold"), padx=15, pady=15, bg='#f0f0f0')
         collision_frame.pack(pady=10, fill="x")
         
         tk.Label(collision_frame, text="Collision Coverage %:", font=("Arial", 11), bg='#f0f0f0').grid(row=0, column=0, padx=10, pady=8, sticky="w")
-        self.coverage_var = tk.IntVar(value=100)
+        self.coverage_var = tk.IntVar(value=int(DEFAULT_COLLISION_COVERAGE * 100))
         coverage_spin = tk.Spinbox(collision_frame, from_=10, to=100, width=12, 
                                   textvariable=self.coverage_var, font=("Arial", 11))
         coverage_spin.grid(row=0, column=1, padx=10, pady=8)
@@ -201,8 +588,23 @@ class SettingsDialog:
                                font=("Arial", 9), fg="gray", bg='#f0f0f0')
         coverage_help.grid(row=1, column=0, columnspan=2, padx=10, pady=5)
         
+        tk.Label(collision_frame, text="Collision Mode:", font=("Arial", 11), bg='#f0f0f0').grid(row=2, column=0, padx=10, pady=8, sticky="w")
+        self.mode_var = tk.StringVar(value=DEFAULT_COLLISION_MODE)
+        mode_menu = tk.OptionMenu(collision_frame, self.mode_var, *COLLISION_MODES)
+        mode_menu.config(width=10, font=("Arial", 11))
+        mode_menu.grid(row=2, column=1, padx=10, pady=8)
+        
+        mode_help = tk.Label(collision_frame, text="(batched is much faster with thousands of objects)",
+                             font=("Arial", 9), fg="gray", bg='#f0f0f0')
+        mode_help.grid(row=3, column=0, columnspan=2, padx=10, pady=5)
+        
+        self.substep_var = tk.BooleanVar(value=False)
+        substep_check = tk.Checkbutton(collision_frame, text="Sub-step fast objects (no tunnelling)",
+                                       variable=self.substep_var, font=("Arial", 11), bg='#f0f0f0')
+        substep_check.grid(row=4, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+        
         # Speed settings
-        speed_frame = tk.LabelFrame(main_frame, text="Speed Settings", 
+        speed_frame = tk.LabelFrame(right_column, text="Speed Settings", 
                                   font=("Arial", 12, "bold"), padx=15, pady=15, bg='#f0f0f0')
         speed_frame.pack(pady=10, fill="x")
         
@@ -222,7 +624,7 @@ class SettingsDialog:
         info_frame = tk.Frame(main_frame, bg='#f0f0f0')
         info_frame.pack(pady=15, fill="x")
         
-        info_text = ("Objects will be divided equally among\nRock, Paper, and Scissors")
+        info_text = ("Objects will be divided equally among\nthe species of the chosen rules")
         tk.Label(info_frame, text=info_text, font=("Arial", 10), 
                 fg="gray", justify="center", bg='#f0f0f0').pack()
         
@@ -265,19 +667,39 @@ class SettingsDialog:
             messagebox.showerror("Error", "Min speed must be less than max speed!")
             return False
         
-        if self.count_var.get() % 3 != 0:
-            # Adjust to nearest multiple of 3
-            adjusted = (self.count_var.get() // 3) * 3
-            if adjusted < 3:
-                adjusted = 3
+        type_count = len(load_ruleset(self.rules_var.get()))
+        if self.count_var.get() % type_count != 0:
+            # Adjust to nearest multiple of the species count
+            adjusted = (self.count_var.get() // type_count) * type_count
+            if adjusted < type_count:
+                adjusted = type_count
             result = messagebox.askyesno("Adjust Object Count", 
-                                       f"Object count must be divisible by 3.\n"
+                                       f"Object count must be divisible by {type_count}.\n"
                                        f"Adjust from {self.count_var.get()} to {adjusted}?")
             if result:
                 self.count_var.set(adjusted)
             else:
                 return False
         
+        scale = self.world_scale_var.get()
+        capacity = placement_capacity(self.size_var.get(), self.width_var.get() * scale,
+                                      self.height_var.get() * scale)
+        if self.count_var.get() > capacity:
+            result = messagebox.askyesno("Crowded Screen",
+                                       f"Only about {capacity} objects of this size fit on the screen "
+                                       f"without overlapping.\n"
+                                       f"Start anyway with some objects overlapping?")
+            if not result:
+                return False
+        
+        if self.mode_var.get() == 'sequential' and self.count_var.get() > SEQUENTIAL_SMOOTH_COUNT:
+            result = messagebox.askyesno("Many Objects",
+                                       f"Sequential collisions run slowly with more than "
+                                       f"{SEQUENTIAL_SMOOTH_COUNT} objects.\n"
+                                       f"Switch to batched collisions?")
+            if result:
+                self.mode_var.set('batched')
+        
         return True
     
     def start_game(self):
@@ -285,11 +707,16 @@ class SettingsDialog:
             self.settings = {
                 'screen_width': self.width_var.get(),
                 'screen_height': self.height_var.get(),
+                'world_width': self.width_var.get() * self.world_scale_var.get(),
+                'world_height': self.height_var.get() * self.world_scale_var.get(),
                 'object_count': self.count_var.get(),
                 'object_size': self.size_var.get(),
                 'speed_min': self.speed_min_var.get(),
                 'speed_max': self.speed_max_var.get(),
-                'collision_coverage': self.coverage_var.get() / 100.0
+                'collision_coverage': self.coverage_var.get() / 100.0,
+                'collision_mode': self.mode_var.get(),
+                'max_substep_travel': DEFAULT_SUBSTEP_TRAVEL if self.substep_var.get() else None,
+                'rules': self.rules_var.get()
             }
             self.root.quit()
             self.root.destroy()
@@ -303,16 +730,13 @@ class SettingsDialog:
         self.root.mainloop()
         return self.settings
 
-class GameObject:
-    def __init__(self, x, y, obj_type, speed_min, speed_max):
-        self.x = x
-        self.y = y
-        self.type = obj_type
-        self.speed_x = random.uniform(speed_min, speed_max) * random.choice([-1, 1])
-        self.speed_y = random.uniform(speed_min, speed_max) * random.choice([-1, 1])
-        self.rotation = 0
-        self.rotation_speed = random.uniform(-5, 5)
-        
+class ObjectBehaviour:
+    """
+    Movement and battle rules shared by GameObject and ObjectView; both
+    provide x, y, type, speed_x, speed_y, rotation and rotation_speed
+    """
+    __slots__ = ()
+    
     def update(self, screen_width, screen_height, object_size):
         # Update position
         self.x += self.speed_x
@@ -348,221 +772,1593 @@ class GameObject:
         collision_threshold = object_size * coverage  
         return distance < collision_threshold
     
-    def battle(self, other):
-        """Battle between two objects based on rock-paper-scissors rules"""
-        if self.type == other.type:
-            return None  
+    def battle(self, other, rules=None):
+        """Winner of a battle between two objects under a Ruleset (classic by default), or None"""
+        beats = (rules or RULESETS['classic']).beats
+        if beats[self.type][other.type]:
+            return self
+        if beats[other.type][self.type]:
+            return other
+        return None
+
+class GameObject(ObjectBehaviour):
+    # No per-instance __dict__: about a third of the memory of a plain instance
+    __slots__ = ('x', 'y', 'type', 'speed_x', 'speed_y', 'rotation', 'rotation_speed')
+    
+    def __init__(self, x, y, obj_type, speed_min, speed_max, rng=random):
+        self.x = x
+        self.y = y
+        self.type = obj_type
+        self.speed_x = rng.uniform(speed_min, speed_max) * rng.choice([-1, 1])
+        self.speed_y = rng.uniform(speed_min, speed_max) * rng.choice([-1, 1])
+        self.rotation = 0
+        self.rotation_speed = rng.uniform(-5, 5)
+
+class ObjectView(ObjectBehaviour):
+    """GameObject-compatible handle onto one row of an ObjectPool"""
+    __slots__ = ('pool', 'index')
+    
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+    
+    def _field(name, cast):
+        def getter(self):
+            return cast(getattr(self.pool, name)[self.index])
+        def setter(self, value):
+            getattr(self.pool, name)[self.index] = value
+        return property(getter, setter)
+    
+    x = _field('x', float)
+    y = _field('y', float)
+    speed_x = _field('speed_x', float)
+    speed_y = _field('speed_y', float)
+    rotation = _field('rotation', float)
+    rotation_speed = _field('rotation_speed', float)
+    type = _field('type', int)
+    del _field
+    
+    def __eq__(self, other):
+        return (isinstance(other, ObjectView) and other.pool is self.pool
+                and other.index == self.index)
+    
+    def __hash__(self):
+        return hash((id(self.pool), self.index))
+
+class ObjectPool:
+    """Structure-of-arrays storage for all objects, updated as whole arrays"""
+    def __init__(self, objects=()):
+        objects = list(objects)
+        # x/y and speed_x/speed_y are rows of one 2xN array each, so
+        # movement and wall bounces are a single operation for both axes
+        self.position = np.array([[obj.x for obj in objects],
+                                  [obj.y for obj in objects]], dtype=np.float64).reshape(2, -1)
+        self.velocity = np.array([[obj.speed_x for obj in objects],
+                                  [obj.speed_y for obj in objects]], dtype=np.float64).reshape(2, -1)
+        self.x, self.y = self.position
+        self.speed_x, self.speed_y = self.velocity
+        self.rotation = np.array([obj.rotation for obj in objects], dtype=np.float64)
+        self.rotation_speed = np.array([obj.rotation_speed for obj in objects], dtype=np.float64)
+        self.type = np.array([obj.type for obj in objects], dtype=np.int8)
+    
+    FIELDS = ('x', 'y', 'speed_x', 'speed_y', 'rotation', 'rotation_speed', 'type')
+    
+    @classmethod
+    def from_arrays(cls, x, y, speed_x, speed_y, rotation, rotation_speed, type):
+        """Build a pool straight from per-field arrays (copied)"""
+        pool = cls()
+        pool.position = np.array([x, y], dtype=np.float64).reshape(2, -1)
+        pool.velocity = np.array([speed_x, speed_y], dtype=np.float64).reshape(2, -1)
+        pool.x, pool.y = pool.position
+        pool.speed_x, pool.speed_y = pool.velocity
+        pool.rotation = np.array(rotation, dtype=np.float64)
+        pool.rotation_speed = np.array(rotation_speed, dtype=np.float64)
+        pool.type = np.array(type, dtype=np.int8)
+        return pool
+    
+    def arrays(self):
+        """Per-field arrays in FIELDS order (views, not copies)"""
+        return {name: getattr(self, name) for name in self.FIELDS}
+    
+    @property
+    def nbytes(self):
+        """Memory used by the object data itself"""
+        return self.position.nbytes + self.velocity.nbytes + self.rotation.nbytes \
+            + self.rotation_speed.nbytes + self.type.nbytes
+    
+    def __len__(self):
+        return len(self.type)
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("object index out of range")
+        return ObjectView(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield ObjectView(self, index)
+    
+    def update(self, screen_width, screen_height, object_size, fraction=1.0):
+        """Same rules as GameObject.update, applied to every object at once, for `fraction` of a tick"""
+        # Update position and rotation
+        if fraction == 1.0:
+            self.position += self.velocity
+            self.rotation += self.rotation_speed
+        else:
+            self.position += self.velocity * fraction
+            self.rotation += self.rotation_speed * fraction
         
-        # Game rules
-        if (self.type == ROCK and other.type == SCISSORS) or \
-           (self.type == SCISSORS and other.type == PAPER) or \
-           (self.type == PAPER and other.type == ROCK):
-            return self  
+        # Wall collision
+        half = object_size // 2
+        high = np.array([[screen_width - half], [screen_height - half]], dtype=np.float64)
+        hit_low = self.position <= half
+        hit_high = self.position >= high
+        hit_high &= ~hit_low
+        np.copysign(self.velocity, 1.0, out=self.velocity, where=hit_low)
+        np.copysign(self.velocity, -1.0, out=self.velocity, where=hit_high)
+        np.copyto(self.position, high, where=hit_high)
+        np.copyto(self.position, half, where=hit_low)
+    
+    def counts(self, type_count=len(OBJECT_NAMES)):
+        """Number of objects of each type"""
+        return np.bincount(self.type, minlength=type_count)
+
+def placement_capacity(object_size, width, height):
+    """Rough number of objects place_objects can fit (random packing saturates near 54% coverage)"""
+    usable = max(width - 2 * object_size, 0) * max(height - 2 * object_size, 0)
+    return int(0.54 * usable / (math.pi * (object_size / 2) ** 2))
+
+def place_objects(count, object_size, width, height, rng, max_candidates=None):
+    """
+    Place up to `count` centers at least `object_size` apart inside the
+    screen, with the same margins as the old rejection sampler.
+    
+    Grid-accelerated dart throwing: candidates are drawn in batches, one
+    random point inside randomly chosen empty cells of a background grid.
+    Cells are object_size / sqrt(2) wide, so each holds at most one point
+    and a check only looks at the 5x5 cells around a candidate. Candidates
+    in cells of the same (cx % 3, cy % 3) class are far enough apart not to
+    conflict with each other, so each class of a batch is accepted in one
+    vectorized pass.
+    
+    Returns (xs, ys) arrays in random order. They are shorter than `count`
+    when the requested density can't be reached.
+    """
+    low_x, low_y = float(object_size), float(object_size)
+    high_x = max(low_x, float(width - object_size))
+    high_y = max(low_y, float(height - object_size))
+    min_distance_sq = float(object_size) ** 2
+    cell = max(object_size, 1) / math.sqrt(2)
+    columns = int((high_x - low_x) // cell) + 1
+    rows = int((high_y - low_y) // cell) + 1
+    
+    # Padded by two cells on every side so neighbourhood lookups never go out of bounds
+    grid = np.full((columns + 4, rows + 4), -1, dtype=np.int64)
+    interior = grid[2:-2, 2:-2]
+    xs = np.zeros(count, dtype=np.float64)
+    ys = np.zeros(count, dtype=np.float64)
+    placed = 0
+    
+    # Cells that can hold a point closer than object_size: the 5x5 block
+    # around a cell minus its corners
+    offset_x, offset_y = np.array([(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
+                                   if abs(dx) + abs(dy) < 4]).T
+    # Only the four edge neighbours can end up completely inside a point's exclusion disk
+    edge_x = np.array([-1, 1, 0, 0])
+    edge_y = np.array([0, 0, -1, 1])
+    
+    if max_candidates is None:
+        max_candidates = 20 * count + 1000
+    drawn = 0
+    idle_batches = 0
+    while placed < count and drawn < max_candidates and idle_batches < 3:
+        empty = np.flatnonzero(interior == -1)
+        if len(empty) == 0:
+            break
+        batch = min(max(2 * (count - placed), 256), max_candidates - drawn)
+        drawn += batch
+        
+        # At most one candidate per empty cell
+        if len(empty) <= batch:
+            cells = empty
         else:
-            return other 
+            cells = np.unique(empty[rng.integers(len(empty), size=batch)])
+        cell_x = cells // rows
+        cell_y = cells % rows
+        candidate_x = low_x + (cell_x + rng.random(len(cells))) * cell
+        candidate_y = low_y + (cell_y + rng.random(len(cells))) * cell
+        inside = (candidate_x <= high_x) & (candidate_y <= high_y)
+        candidate_x = candidate_x[inside]
+        candidate_y = candidate_y[inside]
+        cell_x = cell_x[inside] + 2
+        cell_y = cell_y[inside] + 2
+        first = rng.permutation(len(candidate_x))
+        
+        accepted_before = placed
+        phase = (cell_x[first] % 3) * 3 + cell_y[first] % 3
+        for phase_index in range(9):
+            chosen = first[phase == phase_index]
+            if len(chosen) == 0:
+                continue
+            cx = cell_x[chosen]
+            cy = cell_y[chosen]
+            neighbours = grid[cx[:, None] + offset_x, cy[:, None] + offset_y]
+            occupied = neighbours >= 0
+            dx = xs[neighbours] - candidate_x[chosen][:, None]
+            dy = ys[neighbours] - candidate_y[chosen][:, None]
+            too_close = occupied & (dx * dx + dy * dy < min_distance_sq)
+            chosen = chosen[~too_close.any(axis=1)][:count - placed]
+            
+            new = slice(placed, placed + len(chosen))
+            xs[new] = candidate_x[chosen]
+            ys[new] = candidate_y[chosen]
+            grid[cell_x[chosen], cell_y[chosen]] = np.arange(new.start, new.stop)
+            placed += len(chosen)
+            
+            # Empty cells entirely inside a new point's exclusion disk can
+            # never take a point; mark them (-2) so they are not sampled again
+            near_x = cell_x[chosen][:, None] + edge_x
+            near_y = cell_y[chosen][:, None] + edge_y
+            far_x = np.maximum(np.abs(low_x + (near_x - 2) * cell - xs[new][:, None]),
+                               np.abs(low_x + (near_x - 1) * cell - xs[new][:, None]))
+            far_y = np.maximum(np.abs(low_y + (near_y - 2) * cell - ys[new][:, None]),
+                               np.abs(low_y + (near_y - 1) * cell - ys[new][:, None]))
+            covered = (far_x * far_x + far_y * far_y < min_distance_sq) & (grid[near_x, near_y] == -1)
+            grid[near_x[covered], near_y[covered]] = -2
+            if placed == count:
+                break
+        
+        idle_batches = idle_batches + 1 if placed == accepted_before else 0
+    
+    # Types are assigned in blocks, so hide the order points were accepted in
+    order = rng.permutation(placed)
+    return xs[:placed][order], ys[:placed][order]
 
-class Game:
-    def __init__(self, settings):
-        pygame.init()
+# Grid cells are keyed by one int, cell_x * CELL_KEY_STRIDE + cell_y, which is
+# much smaller than a tuple and makes neighbour keys plain additions
+CELL_KEY_STRIDE = 1 << 24
+NEIGHBOUR_KEY_OFFSETS = tuple(dx * CELL_KEY_STRIDE + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+# Half of the neighbouring cells, so every pair of cells is visited once
+FORWARD_KEY_OFFSETS = (CELL_KEY_STRIDE - 1, CELL_KEY_STRIDE, CELL_KEY_STRIDE + 1, 1)
+
+def expand_ranges(starts, counts):
+    """For ranges [start, start + count): the range number and value of every element"""
+    owners = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owners, starts[owners] + offsets
+
+class SpatialHash:
+    """Uniform grid used as the collision broad phase"""
+    def __init__(self, cell_size):
+        # Two objects can only collide if they are closer than one cell,
+        # so every collision partner is in the same or a neighbouring cell
+        self.cell_size = max(float(cell_size), 1.0)
+        self.cells = {}
+        self.keys = []
+        self.order = np.zeros(0, dtype=np.int64)
+        self.sorted_keys = np.zeros(0, dtype=np.int64)
+
+    def cell_of(self, x, y):
+        return int(x // self.cell_size) * CELL_KEY_STRIDE + int(y // self.cell_size)
+
+    def rebuild(self, xs, ys):
+        """Bucket every object index by the cell containing its center"""
+        cell_xs = np.floor_divide(xs, self.cell_size).astype(np.int64)
+        cell_ys = np.floor_divide(ys, self.cell_size).astype(np.int64)
+        cell_xs *= CELL_KEY_STRIDE
+        cell_xs += cell_ys
+        keys = cell_xs.tolist()
+        cells = {}
+        for index, key in enumerate(keys):
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [index]
+            else:
+                bucket.append(index)
+        self.cells = cells
+        self.keys = keys
+
+    def move(self, index, x, y):
+        """Update the bucket of an object after its position changed"""
+        key = self.cell_of(x, y)
+        old_key = self.keys[index]
+        if key == old_key:
+            return
+        bucket = self.cells[old_key]
+        bucket.remove(index)
+        if not bucket:
+            del self.cells[old_key]
+        self.cells.setdefault(key, []).append(index)
+        self.keys[index] = key
+
+    def neighbours(self, index, after):
+        """Return sorted indices greater than `after` in the 3x3 cells around `index`"""
+        key = self.keys[index]
+        cells = self.cells
+        found = []
+        for offset in NEIGHBOUR_KEY_OFFSETS:
+            bucket = cells.get(key + offset)
+            if bucket:
+                found.extend(j for j in bucket if j > after)
+        found.sort()
+        return found
+    
+    def build_index(self, xs, ys):
+        """
+        Sort object indices by cell key with array operations only; the
+        result backs candidate_pairs(), not the buckets
+        """
+        keys = np.floor_divide(xs, self.cell_size).astype(np.int64)
+        keys *= CELL_KEY_STRIDE
+        keys += np.floor_divide(ys, self.cell_size).astype(np.int64)
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+    
+    def candidate_pairs(self, xs, ys):
+        """
+        Every pair (i, j), i < j, of objects in the same or neighbouring cells,
+        found with array operations only through build_index()
+        """
+        self.build_index(xs, ys)
+        order = self.order
+        cell_keys, starts, sizes = np.unique(self.sorted_keys, return_index=True, return_counts=True)
+        cells = np.repeat(np.arange(len(cell_keys)), sizes)
+        positions = np.arange(len(order))
         
+        # Same cell: every later object in the cell
+        owners, partners = expand_ranges(positions + 1, (starts + sizes)[cells] - positions - 1)
+        firsts = [owners]
+        seconds = [partners]
+        # Forward neighbours: every object of the neighbouring cell
+        for offset in FORWARD_KEY_OFFSETS:
+            targets = cell_keys + offset
+            matches = np.minimum(np.searchsorted(cell_keys, targets), len(cell_keys) - 1)
+            counts = np.where(cell_keys[matches] == targets, sizes[matches], 0)
+            owners, partners = expand_ranges(starts[matches][cells], counts[cells])
+            firsts.append(owners)
+            seconds.append(partners)
+        
+        firsts = order[np.concatenate(firsts)]
+        seconds = order[np.concatenate(seconds)]
+        return np.minimum(firsts, seconds), np.maximum(firsts, seconds)
+
+class Simulation:
+    """Rock paper scissors (or any other Ruleset) without any rendering or frame pacing"""
+    def __init__(self, settings, seed=None, state=None):
+        settings = {**DEFAULT_SETTINGS, **settings}
+        self.settings = settings
+        # Same seed and settings always play out the same round. Unseeded
+        # runs pick a seed up front so they can still be replayed.
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
         self.screen_width = settings['screen_width']
         self.screen_height = settings['screen_height']
+        self.world_width = settings['world_width'] or self.screen_width
+        self.world_height = settings['world_height'] or self.screen_height
         self.object_count = settings['object_count']
         self.object_size = settings['object_size']
         self.speed_min = settings['speed_min']
         self.speed_max = settings['speed_max']
         self.collision_coverage = settings['collision_coverage']
+        self.collision_mode = settings['collision_mode']
+        if self.collision_mode not in COLLISION_MODES:
+            raise ValueError(f"unknown collision mode {self.collision_mode!r}, "
+                             f"expected one of {', '.join(COLLISION_MODES)}")
+        self.rules = load_ruleset(settings['rules'])
+        self.max_substep_travel = settings['max_substep_travel']
+        self.population_limit = settings['population_history']
+        if self.population_limit is not None and self.population_limit < 1:
+            raise ValueError(f"population_history must be at least 1 tick or None, "
+                             f"got {self.population_limit!r}")
+        self.substeps = 1
+        
+        self.spatial_hash = SpatialHash(self.object_size * self.collision_coverage)
+        if state is None:
+            self.reset()
+        else:
+            self.set_state(state)
+    
+    def reset(self):
+        """Place a fresh set of objects and start over from tick 0"""
+        self.create_objects()
+        self.tick = 0
+        self.game_over = False
+        self.winner_type = None
+        self.conversions = []
+        self.pairs_tested = 0
+        self.collisions = 0
+        self.reset_population()
+    
+    def get_state(self):
+        """Copy of everything step() depends on, plus the RNG and population history"""
+        state = {name: array.copy() for name, array in self.objects.arrays().items()}
+        state['tick'] = self.tick
+        state['game_over'] = self.game_over
+        state['winner_type'] = self.winner_type
+        # Only reset() draws from the RNG, but a restored round must restart
+        # the same way the original would have
+        state['rng_state'] = self.rng.getstate()
+        state['population'] = self.population_history().copy()
+        state['population_start'] = self.population_start
+        state['population_peak'] = list(self.population_peak)
+        state['peak_tick'] = list(self.peak_tick)
+        state['extinction_tick'] = list(self.extinction_tick)
+        return state
+    
+    def set_state(self, state):
+        """Restore a state returned by get_state(); the RNG and population history are optional"""
+        self.objects = ObjectPool.from_arrays(*(state[name] for name in ObjectPool.FIELDS))
+        self.tick = state['tick']
+        self.game_over = state['game_over']
+        self.winner_type = state['winner_type']
+        self.conversions = []
+        self.pairs_tested = 0
+        self.collisions = 0
+        if state.get('rng_state') is not None:
+            self.rng.setstate(state['rng_state'])
+        self.reset_population()
+        population = state.get('population')
+        if population is not None and len(population):
+            self.population_start = state['population_start']
+            rows = max(1024, 2 * len(population))
+            if self.population_limit is not None and len(population) < 2 * self.population_limit:
+                rows = 2 * self.population_limit
+            self.population = np.zeros((rows, len(self.rules)), dtype=np.int32)
+            self.population[:len(population)] = population
+            self.population_size = len(population)
+            if state.get('population_peak') is not None:
+                self.population_peak = list(state['population_peak'])
+                self.peak_tick = list(state['peak_tick'])
+                self.extinction_tick = list(state['extinction_tick'])
+            else:
+                self.recount_extremes()
+    
+    def reset_population(self):
+        """Count every type once; handle_collisions keeps the counts current after that"""
+        self.counts = np.bincount(self.objects.type, minlength=len(self.rules)).tolist()
+        # Types still alive when game over was last checked for a stalemate
+        self.alive_types = None
+        self.population_start = self.tick
+        rows = 1024 if self.population_limit is None else min(1024, 2 * self.population_limit)
+        self.population = np.zeros((rows, len(self.rules)), dtype=np.int32)
+        self.population[0] = self.counts
+        self.population_size = 1
+        self.recount_extremes()
+    
+    def recount_extremes(self):
+        """Peak count and tick and first extinction tick per type, from the kept history"""
+        history = self.population_history()
+        start = self.population_start
+        self.population_peak = history.max(axis=0).tolist()
+        self.peak_tick = (history.argmax(axis=0) + start).tolist()
+        extinct = history == 0
+        self.extinction_tick = [int(extinct[:, obj_type].argmax()) + start
+                                if extinct[:, obj_type].any() else None
+                                for obj_type in range(history.shape[1])]
+    
+    def record_population(self):
+        limit = self.population_limit
+        if limit is not None and self.population_size >= 2 * limit:
+            # Keep the newest `limit` ticks; one copy per `limit` ticks
+            drop = self.population_size - limit
+            self.population[:limit] = self.population[drop:self.population_size]
+            self.population_start += drop
+            self.population_size = limit
+        elif self.population_size == len(self.population):
+            # Amortized O(1) growth, up to twice the limit
+            rows = len(self.population)
+            if limit is not None:
+                rows = min(rows, 2 * limit - rows)
+            self.population = np.concatenate([self.population,
+                                              np.zeros((rows, len(self.rules)), dtype=np.int32)])
+        self.population[self.population_size] = self.counts
+        self.population_size += 1
+        # Kept up to date every tick, so they cover the whole round even when
+        # the history itself is capped; counts only change with conversions
+        if not self.conversions:
+            return
+        for obj_type, count in enumerate(self.counts):
+            if count > self.population_peak[obj_type]:
+                self.population_peak[obj_type] = count
+                self.peak_tick[obj_type] = self.tick
+            elif count == 0 and self.extinction_tick[obj_type] is None:
+                self.extinction_tick[obj_type] = self.tick
+    
+    def population_history(self):
+        """
+        Counts per type for every tick since population_start (a view, not a
+        copy). With a population_history limit that is at least the last
+        `limit` ticks and at most twice as many.
+        """
+        return self.population[:self.population_size]
+    
+    def create_objects(self):
+        type_count = len(self.rules)
+        objects_per_type = self.object_count // type_count
+        count = objects_per_type * type_count
+        # NumPy generator derived from the simulation seed, for vectorized sampling
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+        
+        xs, ys = place_objects(count, self.object_size, self.world_width, self.world_height, rng)
+        self.placement_shortfall = count - len(xs)
+        if self.placement_shortfall:
+            # Same fallback as before, but no longer silent
+            print(f"Warning: only {len(xs)} of {count} objects fit without overlapping; "
+                  f"placing the other {self.placement_shortfall} at random")
+            low = self.object_size
+            xs = np.concatenate([xs, rng.uniform(low, max(low, self.world_width - low), self.placement_shortfall)])
+            ys = np.concatenate([ys, rng.uniform(low, max(low, self.world_height - low), self.placement_shortfall)])
+        
+        speeds = rng.uniform(self.speed_min, self.speed_max, (2, count))
+        speeds *= rng.choice([-1.0, 1.0], (2, count))
+        self.objects = ObjectPool.from_arrays(
+            xs, ys, speeds[0], speeds[1],
+            np.zeros(count), rng.uniform(-5, 5, count),
+            np.repeat(np.arange(type_count, dtype=np.int8), objects_per_type))
+    
+    def handle_collisions(self):
+        if self.collision_mode == 'batched':
+            self.resolve_collisions_batched()
+        else:
+            self.resolve_collisions_sequential()
+    
+    def resolve_collisions_sequential(self):
+        # Broad phase: only objects in neighbouring grid cells can collide.
+        # Pairs are visited in the same (i, j) order as a full pairwise scan and
+        # the grid follows every push, so the results are identical to one.
+        pool = self.objects
+        grid = self.spatial_hash
+        grid.rebuild(pool.x, pool.y)
+        
+        # Plain lists are much faster than array scalars for this scalar loop
+        xs = pool.x.tolist()
+        ys = pool.y.tolist()
+        speed_xs = pool.speed_x.tolist()
+        speed_ys = pool.speed_y.tolist()
+        types = pool.type.tolist()
+        beats = self.rules.beats
+        threshold = self.object_size * self.collision_coverage
+        # (object index, new type, old type) for every conversion this tick
+        conversions = []
+        counts = self.counts
+        pairs_tested = 0
+        collisions = 0
+        
+        for i in range(len(types)):
+            cell = grid.keys[i]
+            candidates = grid.neighbours(i, i)
+            k = 0
+            while k < len(candidates):
+                j = candidates[k]
+                k += 1
+                pairs_tested += 1
+                
+                dx = xs[j] - xs[i]
+                dy = ys[j] - ys[i]
+                distance = math.sqrt(dx * dx + dy * dy)
+                if distance >= threshold:
+                    continue
+                collisions += 1
+                
+                # One table lookup per pair, however many species there are
+                if beats[types[i]][types[j]]:
+                    counts[types[j]] -= 1
+                    counts[types[i]] += 1
+                    conversions.append((j, types[i], types[j]))
+                    types[j] = types[i]
+                elif beats[types[j]][types[i]]:
+                    counts[types[i]] -= 1
+                    counts[types[j]] += 1
+                    conversions.append((i, types[j], types[i]))
+                    types[i] = types[j]
+                else:
+                    # Same type, or species that don't beat each other
+                    speed_xs[i], speed_xs[j] = speed_xs[j], speed_xs[i]
+                    speed_ys[i], speed_ys[j] = speed_ys[j], speed_ys[i]
+                    continue
+                
+                if distance > 0:
+                    overlap = threshold - distance
+                    dx_normalized = dx / distance
+                    dy_normalized = dy / distance
+                    xs[i] -= dx_normalized * (overlap / 2)
+                    ys[i] -= dy_normalized * (overlap / 2)
+                    xs[j] += dx_normalized * (overlap / 2)
+                    ys[j] += dy_normalized * (overlap / 2)
+                    
+                    grid.move(i, xs[i], ys[i])
+                    grid.move(j, xs[j], ys[j])
+                    if grid.keys[i] != cell:
+                        # obj1 changed cell, so its remaining partners changed too
+                        cell = grid.keys[i]
+                        candidates = grid.neighbours(i, j)
+                        k = 0
+        
+        pool.x[:] = xs
+        pool.y[:] = ys
+        pool.speed_x[:] = speed_xs
+        pool.speed_y[:] = speed_ys
+        pool.type[:] = types
+        self.conversions = conversions
+        self.pairs_tested = pairs_tested
+        self.collisions = collisions
+    
+    def resolve_collisions_batched(self):
+        """
+        Resolve every collision of the tick at once. All pairs see the state
+        from the start of the stage, so the result does not depend on the
+        order pairs are found or applied in:
+        
+        * a loser takes the type of its lowest-index partner that beats it;
+          an object can lose and also convert the partners it beats
+        * an object touching others it neither beats nor loses to (its own
+          type, usually) takes the velocity of the lowest-index one of them
+          (a plain swap for a single pair)
+        * every colliding pair with a winner is pushed apart by half the
+          overlap each, and the pushes on one object add up
+        
+        Each object converts at most once per tick.
+        """
+        pool = self.objects
+        count = len(pool)
+        threshold = self.object_size * self.collision_coverage
+        first, second = self.spatial_hash.candidate_pairs(pool.x, pool.y)
+        self.pairs_tested = len(first)
+        
+        dx = pool.x[second] - pool.x[first]
+        dy = pool.y[second] - pool.y[first]
+        distance = np.sqrt(dx * dx + dy * dy)
+        hit = distance < threshold
+        # Index order, so floating point sums are the same however pairs were found
+        order = np.lexsort((second[hit], first[hit]))
+        first = first[hit][order]
+        second = second[hit][order]
+        dx = dx[hit][order]
+        dy = dy[hit][order]
+        distance = distance[hit][order]
+        self.collisions = len(first)
+        
+        # Outcomes of all pairs from two gathers into the dominance matrix
+        types = pool.type
+        beats = self.rules.beats_matrix
+        first_types = types[first]
+        second_types = types[second]
+        first_wins = beats[first_types, second_types]
+        if self.rules.has_ties:
+            different = first_wins | beats[second_types, first_types]
+        else:
+            # Every pair of different types has a winner
+            different = first_types != second_types
+        same = ~different
+        
+        # No winner: velocity of the lowest-index such partner
+        partner = np.full(count, count, dtype=np.int64)
+        np.minimum.at(partner, first[same], second[same])
+        np.minimum.at(partner, second[same], first[same])
+        bumped = np.flatnonzero(partner < count)
+        pool.velocity[:, bumped] = pool.velocity[:, partner[bumped]]
+        
+        # The loser converts to its lowest-index winner's type
+        first = first[different]
+        second = second[different]
+        first_wins = first_wins[different]
+        losers = np.where(first_wins, second, first)
+        winners = np.where(first_wins, first, second)
+        beaten_by = np.full(count, count, dtype=np.int64)
+        np.minimum.at(beaten_by, losers, winners)
+        converted = np.flatnonzero(beaten_by < count)
+        old_types = types[converted]
+        new_types = types[beaten_by[converted]]
+        
+        # Separation along the pair's normal, half the overlap each
+        touching = distance[different] > 0
+        first = first[touching]
+        second = second[touching]
+        distance = distance[different][touching]
+        push = (threshold - distance) / 2 / distance
+        push_x = dx[different][touching] * push
+        push_y = dy[different][touching] * push
+        np.add.at(pool.x, first, -push_x)
+        np.add.at(pool.y, first, -push_y)
+        np.add.at(pool.x, second, push_x)
+        np.add.at(pool.y, second, push_y)
+        
+        types[converted] = new_types
+        type_count = len(self.counts)
+        counts = (np.array(self.counts)
+                  - np.bincount(old_types, minlength=type_count)
+                  + np.bincount(new_types, minlength=type_count))
+        self.counts = counts.tolist()
+        self.conversions = list(zip(converted.tolist(), new_types.tolist(), old_types.tolist()))
+    
+    def check_game_over(self):
+        # The game is over once one type holds every object
+        total = len(self.objects)
+        if total == 0:
+            return
+        if max(self.counts) == total:
+            self.game_over = True
+            self.winner_type = self.counts.index(total)
+        elif self.rules.has_ties:
+            # ...or, when some species ignore each other, once none of the
+            # survivors can convert another (a stalemate without a winner)
+            alive = tuple(obj_type for obj_type, count in enumerate(self.counts) if count)
+            if alive != self.alive_types:
+                self.alive_types = alive
+                if not self.rules.can_convert(alive):
+                    self.game_over = True
+    
+    def move_objects(self, fraction=1.0):
+        self.objects.update(self.world_width, self.world_height, self.object_size, fraction)
+    
+    def substep_count(self):
+        """
+        Sub-steps the coming tick needs so that the fastest object travels at
+        most max_substep_travel collision distances in each. Two objects
+        moving head on can then no longer pass through each other between
+        collision checks.
+        """
+        velocity = self.objects.velocity
+        if not self.max_substep_travel or velocity.size == 0:
+            return 1
+        fastest = math.sqrt(float((velocity * velocity).sum(axis=0).max()))
+        limit = self.object_size * self.collision_coverage * self.max_substep_travel
+        return min(max(1, math.ceil(fastest / limit)), MAX_SUBSTEPS)
+    
+    def step(self):
+        """Advance the simulation by one tick"""
+        self.substeps = self.substep_count()
+        if self.substeps == 1:
+            self.move_objects()
+            self.handle_collisions()
+        else:
+            # Move and resolve collisions in equal slices of the tick; the
+            # tick reports the conversions and counters of all of them
+            conversions = []
+            pairs_tested = 0
+            collisions = 0
+            fraction = 1.0 / self.substeps
+            for _ in range(self.substeps):
+                self.move_objects(fraction)
+                self.handle_collisions()
+                conversions += self.conversions
+                pairs_tested += self.pairs_tested
+                collisions += self.collisions
+            self.conversions = conversions
+            self.pairs_tested = pairs_tested
+            self.collisions = collisions
+        self.check_game_over()
+        self.tick += 1
+        self.record_population()
+    
+    def run(self, max_ticks=None):
+        """Step as fast as possible until one type remains or max_ticks is reached"""
+        while not self.game_over and (max_ticks is None or self.tick < max_ticks):
+            self.step()
+        return self.winner_type
+
+class SpriteCache:
+    """Scaled and rotated emoji sprites keyed by (type, size, quantized angle)"""
+    def __init__(self, master_surfaces, angle_step=DEFAULT_SPRITE_ANGLE_STEP,
+                 max_bytes=DEFAULT_SPRITE_CACHE_MB * 1024 * 1024):
+        self.master_surfaces = master_surfaces
+        self.angle_step = angle_step
+        self.steps = max(1, round(360 / angle_step))
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        # Least recently used entries come first. The unrotated sprite at
+        # angle index 0 doubles as the scaled source of the other rotations,
+        # so everything the cache holds counts against max_bytes.
+        self.sprites = OrderedDict()
+    
+    def angle_index(self, angle):
+        """Quantize an angle in degrees to one of the cached rotations"""
+        return round(angle / self.angle_step) % self.steps
+    
+    def get(self, obj_type, size, angle=0):
+        """Return (surface, x offset, y offset) that centers the sprite on a point"""
+        key = (obj_type, size, self.angle_index(angle))
+        entry = self.sprites.get(key)
+        if entry is None:
+            entry = self._build(key)
+        else:
+            self.sprites.move_to_end(key)
+        return entry
+    
+    def warm(self, size):
+        """Build every rotation of every type at one size ahead of time"""
+        for obj_type in self.master_surfaces:
+            for index in range(self.steps):
+                key = (obj_type, size, index)
+                if key not in self.sprites:
+                    self._build(key)
+    
+    def _build(self, key):
+        obj_type, size, index = key
+        if index == 0:
+            surface = pygame.transform.smoothscale(self.master_surfaces[obj_type], (size, size))
+        else:
+            scaled = self.get(obj_type, size)[0]
+            surface = pygame.transform.rotate(scaled, index * self.angle_step)
+        width, height = surface.get_size()
+        entry = (surface, width // 2, height // 2)
+        
+        self.sprites[key] = entry
+        self.used_bytes += width * height * surface.get_bytesize()
+        while self.used_bytes > self.max_bytes and len(self.sprites) > 1:
+            _, (old_surface, _, _) = self.sprites.popitem(last=False)
+            old_width, old_height = old_surface.get_size()
+            self.used_bytes -= old_width * old_height * old_surface.get_bytesize()
+        return entry
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a fixed-size ring buffer"""
+    # Phase name and the Game method that is timed for it
+    PHASES = (
+        ('events', 'handle_events'),
+        ('update', 'move_objects'),
+        ('handle_collisions', 'handle_collisions'),
+        ('check_game_over', 'check_game_over'),
+        ('draw', 'render'),
+        ('flip', 'present')
+    )
+    
+    def __init__(self, capacity=DEFAULT_PROFILER_FRAMES):
+        self.capacity = capacity
+        # One row per frame: seconds spent in each phase
+        self.timings = np.zeros((capacity, len(self.PHASES)), dtype=np.float64)
+        self.frame_times = np.zeros(capacity, dtype=np.float64)
+        # ticks, pairs tested, collisions per frame
+        self.counters = np.zeros((capacity, 3), dtype=np.int64)
+        self.index = 0
+        self.size = 0
+        self.current = [0.0] * len(self.PHASES)
+        self.current_pairs = 0
+        self.current_collisions = 0
+    
+    def attach(self, game):
+        """Shadow the phase methods of `game` with timed wrappers"""
+        clock = time.perf_counter
+        current = self.current
+        for slot, (_, method_name) in enumerate(self.PHASES):
+            method = getattr(game, method_name)
+            
+            def timed(*args, _method=method, _slot=slot, **kwargs):
+                start = clock()
+                result = _method(*args, **kwargs)
+                current[_slot] += clock() - start
+                return result
+            
+            setattr(game, method_name, timed)
+        
+        collide = game.handle_collisions
+        def count_pairs():
+            collide()
+            self.current_pairs += game.pairs_tested
+            self.current_collisions += game.collisions
+        game.handle_collisions = count_pairs
+    
+    def detach(self, game):
+        """Remove the wrappers, restoring the plain methods"""
+        for _, method_name in self.PHASES:
+            game.__dict__.pop(method_name, None)
+    
+    def end_frame(self, frame_time, ticks):
+        """Store the current frame and start the next one"""
+        row = self.index
+        self.timings[row] = self.current
+        self.frame_times[row] = frame_time
+        self.counters[row] = (ticks, self.current_pairs, self.current_collisions)
+        self.index = (row + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        for slot in range(len(self.current)):
+            self.current[slot] = 0.0
+        self.current_pairs = 0
+        self.current_collisions = 0
+    
+    def ordered(self, array):
+        """Rows of a ring buffer, oldest first"""
+        if self.size < self.capacity:
+            return array[:self.size]
+        return np.concatenate([array[self.index:], array[:self.index]])
+    
+    def percentiles(self):
+        """(phase, p50 ms, p99 ms) for every phase over the buffered frames"""
+        if self.size == 0:
+            return [(phase, 0.0, 0.0) for phase, _ in self.PHASES]
+        timings = self.timings[:self.size] * 1000.0
+        p50 = np.percentile(timings, 50, axis=0)
+        p99 = np.percentile(timings, 99, axis=0)
+        return [(phase, p50[slot], p99[slot]) for slot, (phase, _) in enumerate(self.PHASES)]
+    
+    def last_frame_counts(self):
+        """(pairs tested, collisions, ticks) of the last finished frame"""
+        if self.size == 0:
+            return (0, 0, 0)
+        ticks, pairs, collisions = self.counters[self.index - 1].tolist()
+        return (pairs, collisions, ticks)
+    
+    def dump_csv(self, path):
+        """Write the buffered frames, oldest first, with timings in milliseconds"""
+        header = (["frame_ms"] + [f"{phase}_ms" for phase, _ in self.PHASES]
+                  + ["ticks", "pairs_tested", "collisions"])
+        frames = np.column_stack([self.ordered(self.frame_times) * 1000.0,
+                                  self.ordered(self.timings) * 1000.0,
+                                  self.ordered(self.counters)])
+        with open(path, "w") as output:
+            output.write(",".join(header) + "\n")
+            for row in frames.tolist():
+                output.write(",".join(f"{value:.4f}" for value in row[:-3]) + ","
+                             + ",".join(str(int(value)) for value in row[-3:]) + "\n")
+
+class Game(Simulation):
+    def __init__(self, settings, seed=None, state=None):
+        super().__init__(settings, seed, state)
+        import_pygame()
+        pygame.init()
         
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption("Rock Paper Scissors Simulation")
         self.clock = pygame.time.Clock()
         
-        # --- START OF FINAL FIX ---
-        print("Loading local emoji font...")
-        self.big_font = load_font(48)
-        self.ui_emoji_font = load_font(16)
-        MASTER_FONT_SIZE = 128 
-        master_emoji_font = load_font(MASTER_FONT_SIZE)
+        self.master_surfaces = self.load_master_surfaces()
         
-        self.master_surfaces = {
-            ROCK: master_emoji_font.render(EMOJIS[ROCK], True, BLACK),
-            PAPER: master_emoji_font.render(EMOJIS[PAPER], True, BLACK),
-            SCISSORS: master_emoji_font.render(EMOJIS[SCISSORS], True, BLACK)
-        }
-        
-        # 2. Define standard text fonts (no longer used for emojis)
+        # Standard text fonts (not used for emojis)
         self.text_font = pygame.font.Font(None, 20)
         self.big_font = pygame.font.Font(None, 48)
-        # --- END OF FINAL FIX ---
         
-        self.objects = []
-        self.create_objects()
+        # Every rotation at the object size is rendered once up front, so
+        # drawing an object is a dictionary lookup and a blit
+        self.sprites = SpriteCache(self.master_surfaces,
+                                   self.settings['sprite_angle_step'],
+                                   self.settings['sprite_cache_mb'] * 1024 * 1024)
+        self.sprites.warm(self.object_size)
+        
+        # Camera: world position of the window's top-left corner and screen
+        # pixels per world unit. A world the size of the window is shown 1:1.
+        self.zoom = 1.0
+        self.camera_x = (self.world_width - self.screen_width) / 2
+        self.camera_y = (self.world_height - self.screen_height) / 2
+        self.clamp_camera()
+        # Objects inside the viewport, kept until the tick or the camera changes
+        self.visible = None
+        self.visible_key = None
         
         self.running = True
-        self.game_over = False
-        self.winner_type = None
+        self.speed_index = 0
+        # Frames not drawn to catch up, and ticks given up on when even that was not enough
+        self.skipped_frames = 0
+        self.dropped_ticks = 0
+        self.accumulator = 0.0
+        self.profiler = FrameProfiler()
+        self.show_profiler = False
         
+        # Dirty-rect rendering: what was drawn last frame, and the regions
+        # to push to the display this frame (None means a full flip)
+        self.dirty_rects = bool(self.settings['dirty_rects'])
+        self.background = pygame.Surface(self.screen.get_size()).convert()
+        self.background.fill(WHITE)
+        self.drawn_rects = None
+        self.drawn_area = 0
+        self.update_rects = None
+        
+        # Density map: one pixel per LOD cell, scaled up to cover the screen
+        grid_width = -(-self.screen_width // LOD_CELL_SIZE)
+        grid_height = -(-self.screen_height // LOD_CELL_SIZE)
+        self.density_surface = pygame.Surface((grid_width, grid_height)).convert()
+        self.density_scaled = pygame.Surface((grid_width * LOD_CELL_SIZE,
+                                              grid_height * LOD_CELL_SIZE)).convert()
+        self.density_colors = np.array([self.rules.colors[obj_type] for obj_type in sorted(self.rules.colors)],
+                                       dtype=np.float32)
+        self.density_active = False
+        self.density_key = None
+    
+    def step(self):
+        # Keep the previous positions so frames can be drawn between two ticks
+        self.previous_position = self.objects.position.copy()
+        super().step()
+    
+    def reset(self):
+        super().reset()
+        self.previous_position = self.objects.position.copy()
+        self.visible_key = None
+        self.density_key = None
+    
+    def set_state(self, state):
+        super().set_state(state)
+        self.previous_position = self.objects.position.copy()
+        self.visible_key = None
+        self.density_key = None
+        
+    def load_master_surfaces(self):
+        """Every emoji at a large size, from the cached atlas; all sprites are scaled from these"""
+        return load_emoji_atlas(emojis=self.rules.emojis)
+    
     def test_emoji_support(self):
         # This function is no longer needed with the new method
         pass
         
-    def create_objects(self):
-        objects_per_type = self.object_count // 3
-        
-        for obj_type in [ROCK, PAPER, SCISSORS]:
-            for _ in range(objects_per_type):
-                attempts = 0
-                while attempts < 100:
-                    x = random.randint(self.object_size, self.screen_width - self.object_size)
-                    y = random.randint(self.object_size, self.screen_height - self.object_size)
-                    
-                    new_obj = GameObject(x, y, obj_type, self.speed_min, self.speed_max)
-                    collision = False
-                    for existing_obj in self.objects:
-                        if new_obj.collides_with(existing_obj, self.object_size, 1.0):
-                            collision = True
-                            break
-                    
-                    if not collision:
-                        self.objects.append(new_obj)
-                        break
-                    attempts += 1
-                
-                if attempts >= 100:
-                    self.objects.append(GameObject(x, y, obj_type, self.speed_min, self.speed_max))
+    def draw_object(self, obj):
+        surface, offset_x, offset_y = self.sprites.get(obj.type, self.object_size, obj.rotation)
+        self.screen.blit(surface, (int(obj.x) - offset_x, int(obj.y) - offset_y))
     
-    def handle_collisions(self):
-        for i in range(len(self.objects)):
-            for j in range(i + 1, len(self.objects)):
-                obj1 = self.objects[i]
-                obj2 = self.objects[j]
-                
-                if obj1.collides_with(obj2, self.object_size, self.collision_coverage):
-                    if obj1.type == obj2.type:
-                        obj1.speed_x, obj2.speed_x = obj2.speed_x, obj1.speed_x
-                        obj1.speed_y, obj2.speed_y = obj2.speed_y, obj1.speed_y
-                    else:
-                        winner = obj1.battle(obj2)
-                        if winner:
-                            if winner == obj1:
-                                obj2.type = obj1.type
-                            else:
-                                obj1.type = obj2.type
-                        
-                        dx = obj2.x - obj1.x
-                        dy = obj2.y - obj1.y
-                        distance = math.sqrt(dx * dx + dy * dy)
-                        if distance > 0:
-                            overlap = (self.object_size * self.collision_coverage) - distance
-                            dx_normalized = dx / distance
-                            dy_normalized = dy / distance
-                            obj1.x -= dx_normalized * (overlap / 2)
-                            obj1.y -= dy_normalized * (overlap / 2)
-                            obj2.x += dx_normalized * (overlap / 2)
-                            obj2.y += dy_normalized * (overlap / 2)
+    # --- Camera ---
     
-    def check_game_over(self):
-        if len(self.objects) == 0:
-            return
-        first_type = self.objects[0].type
-        if all(obj.type == first_type for obj in self.objects):
-            self.game_over = True
-            self.winner_type = first_type
+    def view_size(self):
+        """Width and height of the viewport in world units"""
+        return self.screen_width / self.zoom, self.screen_height / self.zoom
     
-    def draw_object(self, obj):
-        master_surface = self.master_surfaces[obj.type]
-        desired_size = (self.object_size, self.object_size)
-        scaled_surface = pygame.transform.smoothscale(master_surface, desired_size)
-        rotated_surface = pygame.transform.rotate(scaled_surface, obj.rotation)
-        rect = rotated_surface.get_rect(center=(int(obj.x), int(obj.y)))
-        self.screen.blit(rotated_surface, rect)
+    def fit_zoom(self):
+        return min(self.screen_width / self.world_width, self.screen_height / self.world_height)
+    
+    def clamp_camera(self):
+        """Keep the viewport over the world, or centered on it when the whole world fits"""
+        view_width, view_height = self.view_size()
+        if view_width >= self.world_width:
+            self.camera_x = (self.world_width - view_width) / 2
+        else:
+            self.camera_x = min(max(self.camera_x, 0.0), self.world_width - view_width)
+        if view_height >= self.world_height:
+            self.camera_y = (self.world_height - view_height) / 2
+        else:
+            self.camera_y = min(max(self.camera_y, 0.0), self.world_height - view_height)
+    
+    def pan(self, dx, dy):
+        """Move the camera by a distance in screen pixels"""
+        self.camera_x += dx / self.zoom
+        self.camera_y += dy / self.zoom
+        self.clamp_camera()
+    
+    def zoom_at(self, factor, screen_x, screen_y):
+        """Zoom by `factor`, keeping the world point under (screen_x, screen_y) in place"""
+        world_x = self.camera_x + screen_x / self.zoom
+        world_y = self.camera_y + screen_y / self.zoom
+        self.zoom = min(max(self.zoom * factor, min(1.0, self.fit_zoom())), MAX_ZOOM)
+        self.camera_x = world_x - screen_x / self.zoom
+        self.camera_y = world_y - screen_y / self.zoom
+        self.clamp_camera()
+    
+    def toggle_fit_world(self):
+        """Switch between showing the whole world and a 1:1 view of its middle"""
+        if self.zoom == self.fit_zoom():
+            self.zoom_at(1.0 / self.zoom, self.screen_width / 2, self.screen_height / 2)
+        else:
+            self.zoom = self.fit_zoom()
+            self.clamp_camera()
+    
+    def update_camera(self, frame_time):
+        """Pan with the arrow keys while they are held"""
+        keys = pygame.key.get_pressed()
+        dx = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+        dy = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+        if dx or dy:
+            distance = CAMERA_PAN_SPEED * frame_time
+            self.pan(dx * distance, dy * distance)
+    
+    def visible_objects(self):
+        """Sorted indices of the objects that can show in the viewport; None means all of them"""
+        view_width, view_height = self.view_size()
+        # Objects never leave the world, so a view covering it shows them all
+        if (self.camera_x <= 0 and self.camera_y <= 0
+                and self.camera_x + view_width >= self.world_width
+                and self.camera_y + view_height >= self.world_height):
+            return None
+        key = (self.tick, self.camera_x, self.camera_y, self.zoom)
+        if key != self.visible_key:
+            # One linear pass over the positions; sorting them into a grid
+            # first costs more than it saves when it is redone every tick
+            margin = self.object_size
+            x = self.objects.x
+            y = self.objects.y
+            inside = x >= self.camera_x - margin
+            inside &= x <= self.camera_x + view_width + margin
+            inside &= y >= self.camera_y - margin
+            inside &= y <= self.camera_y + view_height + margin
+            self.visible = np.flatnonzero(inside)
+            self.visible_key = key
+        return self.visible
+    
+    def use_density_map(self, visible):
+        """Whether the view is too dense or too zoomed out to draw one sprite per object"""
+        density = self.settings['lod_density']
+        if density is None:
+            return False
+        if self.object_size * self.zoom < LOD_MIN_SPRITE_SIZE:
+            return True
+        count = len(self.objects) if visible is None else len(visible)
+        return count * 100 * 100 > density * self.screen_width * self.screen_height
+    
+    def draw_density_map(self, visible):
+        """Draw the visible objects as per-cell type colors, shaded by how much of the cell they cover"""
+        key = (self.tick, self.camera_x, self.camera_y, self.zoom)
+        if key != self.density_key:
+            # Nothing moved since the last frame (paused or game over): reuse the map
+            self.density_key = key
+            pool = self.objects
+            types = pool.type
+            position = pool.position
+            if visible is not None:
+                types = types[visible]
+                position = position[:, visible]
+            
+            grid_width, grid_height = self.density_surface.get_size()
+            scale = self.zoom / LOD_CELL_SIZE
+            cell_x = ((position[0] - self.camera_x) * scale).astype(np.intp)
+            cell_y = ((position[1] - self.camera_y) * scale).astype(np.intp)
+            inside = (cell_x >= 0) & (cell_x < grid_width) & (cell_y >= 0) & (cell_y < grid_height)
+            
+            # Histogram of (cell, type) in one bincount
+            type_count = len(self.density_colors)
+            bins = (cell_x[inside] * grid_height + cell_y[inside]) * type_count + types[inside]
+            counts = np.bincount(bins, minlength=grid_width * grid_height * type_count)
+            counts = counts.reshape(grid_width, grid_height, type_count).astype(np.float32)
+            total = counts.sum(axis=2)
+            
+            # Mix the type colors by count, then fade to white by the share
+            # of the cell the objects' sprites would cover
+            sprite_area = (self.object_size * self.zoom) ** 2
+            coverage = np.minimum(total * (sprite_area / (LOD_CELL_SIZE * LOD_CELL_SIZE)), 1.0)
+            mix = counts @ self.density_colors / np.maximum(total, 1.0)[:, :, None]
+            pixels = 255.0 - (255.0 - mix) * coverage[:, :, None]
+            pygame.surfarray.blit_array(self.density_surface, pixels.astype(np.uint8))
+            pygame.transform.scale(self.density_surface, self.density_scaled.get_size(),
+                                   self.density_scaled)
+        return [self.screen.blit(self.density_scaled, (0, 0))]
     
-    def draw(self):
-        self.screen.fill(WHITE)
+    def draw_objects(self, alpha=1.0):
+        """Blit the objects inside the viewport in one batch straight from the pool arrays"""
+        visible = self.visible_objects()
+        self.density_active = self.use_density_map(visible)
+        if self.density_active:
+            return self.draw_density_map(visible)
         
-        for obj in self.objects:
-            self.draw_object(obj)
+        pool = self.objects
+        get_sprite = self.sprites.get
+        size = self.object_size if self.zoom == 1.0 else max(2, round(self.object_size * self.zoom))
+        
+        types = pool.type
+        position = pool.position
+        rotation = pool.rotation
+        rotation_speed = pool.rotation_speed
+        previous = self.previous_position
+        interpolate = alpha < 1.0 and previous.shape == position.shape
+        if visible is not None:
+            # Only the visible slice is gathered, interpolated and blitted
+            types = types[visible]
+            position = position[:, visible]
+            rotation = rotation[visible]
+            rotation_speed = rotation_speed[visible]
+            if interpolate:
+                previous = previous[:, visible]
+        
+        # Interpolate between the last two ticks; alpha 1 is the current tick
+        if interpolate:
+            position = previous + (position - previous) * alpha
+            rotation = rotation - rotation_speed * (1.0 - alpha)
+        if self.zoom != 1.0 or self.camera_x or self.camera_y:
+            position = (position - np.array([[self.camera_x], [self.camera_y]])) * self.zoom
+        
+        blits = []
+        for obj_type, x, y, rotation in zip(types.tolist(), position[0].tolist(),
+                                            position[1].tolist(), rotation.tolist()):
+            surface, offset_x, offset_y = get_sprite(obj_type, size, rotation)
+            blits.append((surface, (int(x) - offset_x, int(y) - offset_y)))
+        return self.screen.blits(blits, self.dirty_rects)
+    
+    def draw(self, alpha=1.0):
+        self.render(alpha)
+        self.present()
+    
+    def present(self):
+        if self.update_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.update_rects)
+    
+    def render(self, alpha=1.0):
+        """Draw a frame; in dirty-rect mode only last frame's sprites and text are erased"""
+        limit = self.settings['dirty_rect_threshold'] * self.screen_width * self.screen_height
+        erased = self.drawn_rects
+        if erased is not None and self.drawn_area <= limit:
+            # Everything is redrawn below, so erasing what was drawn last
+            # frame leaves the same picture as clearing the whole screen.
+            # One batched blit from a blank surface is much cheaper than a
+            # fill() call per rect
+            background = self.background
+            self.screen.blits([(background, rect, rect) for rect in erased], False)
+        else:
+            erased = None
+            self.screen.fill(WHITE)
+        
+        drawn = self.draw_objects(alpha) or []
+        drawn += self.draw_hud()
+        
+        if self.dirty_rects:
+            area = sum(rect.w * rect.h for rect in drawn)
+            if erased is not None and self.drawn_area + area <= limit:
+                self.update_rects = erased + drawn
+            else:
+                self.update_rects = None
+            self.drawn_rects = drawn
+            self.drawn_area = area
+        else:
+            self.update_rects = None
+            self.drawn_rects = None
+    
+    def draw_hud(self):
+        """Counters, speed, winner banner and profiler overlay; returns the rects drawn"""
+        drawn = []
         
         # --- START OF STATS COUNTER FIX ---
-        counts = {ROCK: 0, PAPER: 0, SCISSORS: 0}
-        for obj in self.objects:
-            counts[obj.type] += 1
+        counts = dict(enumerate(self.counts))
         
         y_offset = 10
         UI_EMOJI_SIZE = (18, 18) # Define a fixed size for UI emojis
         for obj_type, count in counts.items():
-            # Scale master surface for the UI emoji
-            master_surface = self.master_surfaces[obj_type]
-            emoji_surface = pygame.transform.smoothscale(master_surface, UI_EMOJI_SIZE)
+            # Scaled UI emoji comes from the sprite cache
+            emoji_surface = self.sprites.get(obj_type, UI_EMOJI_SIZE[0])[0]
             
             # Render text part
-            name = OBJECT_NAMES[obj_type]
+            name = self.rules.names[obj_type]
             text_surface = self.text_font.render(f" {name}: {count}", True, BLACK)
             
-            self.screen.blit(emoji_surface, (10, y_offset))
-            self.screen.blit(text_surface, (10 + UI_EMOJI_SIZE[0], y_offset))
+            drawn.append(self.screen.blit(emoji_surface, (10, y_offset)))
+            text_rect = self.screen.blit(text_surface, (10 + UI_EMOJI_SIZE[0], y_offset))
+            drawn.append(text_rect)
+            if self.density_active:
+                # Key for the density map colors
+                swatch = pygame.Rect(text_rect.right + 8, y_offset + 3, 12, 12)
+                drawn.append(pygame.draw.rect(self.screen, self.rules.colors[obj_type], swatch))
             y_offset += 25
         # --- END OF STATS COUNTER FIX ---
+        
+        multiplier = SPEED_MULTIPLIERS[self.speed_index]
+        speed_text = "Speed: MAX" if multiplier is None else f"Speed: {multiplier}x"
+        speed_surface = self.text_font.render(f"{speed_text}  (1-4 to change)", True, GRAY)
+        drawn.append(self.screen.blit(speed_surface, (10, y_offset)))
+        
+        if self.world_width > self.screen_width or self.world_height > self.screen_height:
+            y_offset += 25
+            camera_text = (f"View {self.zoom:.2f}x at ({self.camera_x:.0f}, {self.camera_y:.0f}) of "
+                           f"{self.world_width}x{self.world_height}  (arrows/drag pan, wheel zoom, F fit)")
+            camera_surface = self.text_font.render(camera_text, True, GRAY)
+            drawn.append(self.screen.blit(camera_surface, (10, y_offset)))
 
         if self.game_over:
             # --- START OF WINNER MESSAGE FIX ---
-            winner_name = OBJECT_NAMES[self.winner_type]
-            
-            # 1. Render text part
-            text_surface = self.big_font.render(f"WINNER: {winner_name}", True, BLACK)
+            # 1. Render text part (no winner when the survivors can't convert each other)
+            if self.winner_type is None:
+                message = "STALEMATE"
+            else:
+                message = f"WINNER: {self.rules.names[self.winner_type]}"
+            text_surface = self.big_font.render(message, True, BLACK)
             text_rect = text_surface.get_rect(center=(self.screen_width // 2, self.screen_height // 2))
 
-            # 2. Scale master surface for the winner emoji
+            # 2. Scaled winner emoji comes from the sprite cache
             WINNER_EMOJI_SIZE = (48, 48)
-            master_emoji_surface = self.master_surfaces[self.winner_type]
-            winner_emoji_surface = pygame.transform.smoothscale(master_emoji_surface, WINNER_EMOJI_SIZE)
-            
-            # Position the emoji next to the text
-            emoji_rect = winner_emoji_surface.get_rect(midleft=(text_rect.right + 10, text_rect.centery))
+            winner_emoji_surface = None
+            combined_rect = text_rect
+            if self.winner_type is not None:
+                winner_emoji_surface = self.sprites.get(self.winner_type, WINNER_EMOJI_SIZE[0])[0]
+                
+                # Position the emoji next to the text
+                emoji_rect = winner_emoji_surface.get_rect(midleft=(text_rect.right + 10, text_rect.centery))
+                combined_rect = text_rect.union(emoji_rect)
 
             # Background for both
-            combined_rect = text_rect.union(emoji_rect)
             background_rect = combined_rect.inflate(40, 20)
-            pygame.draw.rect(self.screen, WHITE, background_rect)
+            drawn.append(pygame.draw.rect(self.screen, WHITE, background_rect))
             pygame.draw.rect(self.screen, BLACK, background_rect, 3)
 
             # Draw text and emoji
             self.screen.blit(text_surface, text_rect)
-            self.screen.blit(winner_emoji_surface, emoji_rect)
+            if winner_emoji_surface is not None:
+                self.screen.blit(winner_emoji_surface, emoji_rect)
             # --- END OF WINNER MESSAGE FIX ---
             
             restart_text = "Press R to restart, ESC to exit"
             restart_surface = self.text_font.render(restart_text, True, BLACK)
             restart_rect = restart_surface.get_rect(center=(self.screen_width // 2, background_rect.bottom + 30))
-            self.screen.blit(restart_surface, restart_rect)
+            drawn.append(self.screen.blit(restart_surface, restart_rect))
         
-        pygame.display.flip()
+        if self.show_profiler:
+            drawn.append(self.draw_profiler_overlay())
+        return drawn
+    
+    def draw_profiler_overlay(self):
+        """FPS, p50/p99 per phase and collision pairs in the top right corner"""
+        lines = [f"FPS {self.clock.get_fps():5.1f}   frames {self.profiler.size}"]
+        for phase, p50, p99 in self.profiler.percentiles():
+            lines.append(f"{phase:<17} p50 {p50:6.2f} ms  p99 {p99:6.2f} ms")
+        pairs, collisions, ticks = self.profiler.last_frame_counts()
+        lines.append(f"ticks {ticks}  pairs {pairs}  collisions {collisions}")
+        if self.max_substep_travel:
+            lines.append(f"sub-steps per tick {self.substeps}")
+        lines.append(f"frames skipped {self.skipped_frames}  ticks dropped {self.dropped_ticks}")
+        if self.density_active:
+            lines.append("objects drawn as a density map")
+        if not self.dirty_rects:
+            lines.append("render full flip (D for dirty rects)")
+        elif self.update_rects is None:
+            lines.append("render dirty rects, last frame flipped")
+        else:
+            lines.append(f"render dirty rects, {len(self.update_rects)} rects")
+        lines.append("F3 hide  F4 save CSV")
+        
+        surfaces = [self.text_font.render(line, True, BLACK) for line in lines]
+        width = max(surface.get_width() for surface in surfaces) + 20
+        height = 18 * len(surfaces) + 10
+        panel = pygame.Rect(self.screen_width - width - 10, 10, width, height)
+        pygame.draw.rect(self.screen, LIGHT_GRAY, panel)
+        pygame.draw.rect(self.screen, GRAY, panel, 1)
+        for index, surface in enumerate(surfaces):
+            self.screen.blit(surface, (panel.x + 10, panel.y + 5 + 18 * index))
+        return panel
+    
+    def handle_events(self):
+        speed_keys = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4]
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type == pygame.MOUSEWHEEL:
+                self.zoom_at(ZOOM_STEP ** event.y, *pygame.mouse.get_pos())
+            elif event.type == pygame.MOUSEMOTION and event.buttons[0]:
+                self.pan(-event.rel[0], -event.rel[1])
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # The window contents were lost: repaint everything next frame
+                self.drawn_rects = None
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_r and self.game_over:
+                    self.reset()
+                    self.accumulator = 0.0
+                elif event.key == pygame.K_ESCAPE:
+                    self.running = False
+                elif event.key in speed_keys[:len(SPEED_MULTIPLIERS)]:
+                    self.speed_index = speed_keys.index(event.key)
+                elif event.key == pygame.K_d:
+                    self.toggle_dirty_rects()
+                elif event.key == pygame.K_f:
+                    self.toggle_fit_world()
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.zoom_at(ZOOM_STEP, self.screen_width / 2, self.screen_height / 2)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.zoom_at(1 / ZOOM_STEP, self.screen_width / 2, self.screen_height / 2)
+                elif event.key == pygame.K_F3:
+                    self.toggle_profiler()
+                elif event.key == pygame.K_F4 and self.profiler.size:
+                    path = time.strftime("rps_profile_%Y%m%d_%H%M%S.csv")
+                    self.profiler.dump_csv(path)
+                    print(f"Saved frame profile to {path}")
+                elif event.key == pygame.K_F5:
+                    from rps_checkpoint import save_checkpoint
+                    path = time.strftime("rps_checkpoint_%Y%m%d_%H%M%S.rpsc")
+                    save_checkpoint(self, path)
+                    print(f"Saved checkpoint of tick {self.tick} to {path} (resume with --resume)")
+    
+    def toggle_dirty_rects(self):
+        """Switch between dirty-rect updates and flipping the whole screen"""
+        self.dirty_rects = not self.dirty_rects
+        self.drawn_rects = None
+    
+    def toggle_profiler(self):
+        """Start or stop timing every phase; stopped profiling costs nothing"""
+        self.show_profiler = not self.show_profiler
+        if self.show_profiler:
+            self.profiler.attach(self)
+        else:
+            self.profiler.detach(self)
     
     def run(self):
+        # Fixed timestep: the simulation advances in ticks of 1 / SIMULATION_TICK_RATE
+        # seconds scaled by the speed multiplier, independent of the frame rate
+        tick_time = 1.0 / SIMULATION_TICK_RATE
+        frame_budget = SIMULATION_FRAME_BUDGET / DEFAULT_FPS
+        self.accumulator = 0.0
+        previous = time.perf_counter()
+        skipped_in_row = 0
+        
         while self.running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r and self.game_over:
-                        self.objects = []
-                        self.create_objects()
-                        self.game_over = False
-                        self.winner_type = None
-                    elif event.key == pygame.K_ESCAPE:
-                        self.running = False
+            frame_start = time.perf_counter()
+            self.handle_events()
+            
+            now = time.perf_counter()
+            frame_time = min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            deadline = now + frame_budget
+            self.update_camera(frame_time)
+            alpha = 1.0
+            start_tick = self.tick
+            behind = False
             
             if not self.game_over:
-                for obj in self.objects:
-                    obj.update(self.screen_width, self.screen_height, self.object_size)
-                self.handle_collisions()
-                self.check_game_over()
+                multiplier = SPEED_MULTIPLIERS[self.speed_index]
+                if multiplier is None:
+                    # As many ticks as fit in the frame budget
+                    self.step()
+                    while not self.game_over and time.perf_counter() < deadline:
+                        self.step()
+                    self.accumulator = 0.0
+                else:
+                    self.accumulator += frame_time * multiplier
+                    while self.accumulator >= tick_time and not self.game_over:
+                        self.step()
+                        self.accumulator -= tick_time
+                        if time.perf_counter() >= deadline and self.accumulator >= tick_time:
+                            behind = True
+                            break
+                    if behind and skipped_in_row >= MAX_SKIPPED_FRAMES:
+                        # Too slow to keep up even without drawing: drop the
+                        # backlog rather than spending ever longer frames on it
+                        self.dropped_ticks += int(self.accumulator / tick_time)
+                        self.accumulator %= tick_time
+                        behind = False
+                    alpha = self.accumulator / tick_time
             
-            self.draw()
+            if behind:
+                # Keep the simulation at its rate by not drawing this frame
+                self.skipped_frames += 1
+                skipped_in_row += 1
+            else:
+                self.draw(alpha)
+                skipped_in_row = 0
+            if self.show_profiler:
+                self.profiler.end_frame(time.perf_counter() - frame_start, self.tick - start_tick)
             self.clock.tick(DEFAULT_FPS)
         
         pygame.quit()
+def add_settings_arguments(parser):
+    """Add one command-line option per SettingsDialog field"""
+    group = parser.add_argument_group("simulation settings")
+    group.add_argument("--width", type=int, default=DEFAULT_SCREEN_WIDTH, help="screen width")
+    group.add_argument("--height", type=int, default=DEFAULT_SCREEN_HEIGHT, help="screen height")
+    group.add_argument("--world-width", type=int, default=None,
+                       help="width of the world the objects move in (default: screen width)")
+    group.add_argument("--world-height", type=int, default=None,
+                       help="height of the world the objects move in (default: screen height)")
+    group.add_argument("--objects", type=int, default=DEFAULT_OBJECT_COUNT, help="total objects")
+    group.add_argument("--size", type=int, default=DEFAULT_OBJECT_SIZE, help="object size")
+    group.add_argument("--speed-min", type=float, default=DEFAULT_SPEED_MIN, help="min speed")
+    group.add_argument("--speed-max", type=float, default=DEFAULT_SPEED_MAX, help="max speed")
+    group.add_argument("--coverage", type=int, default=int(DEFAULT_COLLISION_COVERAGE * 100),
+                       help="collision coverage %% (lower values = objects must overlap more)")
+    group.add_argument("--substep-travel", type=float, default=None, metavar="FRACTION",
+                       help="split ticks into sub-steps so no object moves more than FRACTION of "
+                            f"the collision distance per sub-step (e.g. {DEFAULT_SUBSTEP_TRAVEL}); "
+                            "keeps fast objects from passing through each other. Default: off")
+    group.add_argument("--population-history", type=int, default=None, metavar="TICKS",
+                       help="keep only the last TICKS ticks of per-type counts in memory, so "
+                            "memory stays flat on long runs (e.g. with --telemetry, which "
+                            "writes every tick to disk). Default: keep the whole round")
+    group.add_argument("--rules", default=DEFAULT_SETTINGS['rules'],
+                       help=f"species and who beats whom: {', '.join(RULESETS)}, cyclic-N "
+                            f"(3-{len(CYCLIC_SPECIES)} species) or a JSON ruleset file")
+    group.add_argument("--collisions", choices=COLLISION_MODES, default=DEFAULT_COLLISION_MODE,
+                       help="resolve collisions one pair at a time in index order (sequential) "
+                            "or all at once from the start-of-tick state (batched, much faster "
+                            "with many objects)")
+    return group
+
+def settings_from_args(parser, args):
+    """Build a settings dict from parsed options, with the same checks as the dialog"""
+    if args.speed_min >= args.speed_max:
+        parser.error("min speed must be less than max speed")
+    try:
+        type_count = len(load_ruleset(args.rules))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.objects < type_count or args.objects % type_count != 0:
+        parser.error(f"object count must be a positive multiple of {type_count} "
+                     f"(the number of species)")
+    if args.population_history is not None and args.population_history < 1:
+        parser.error("population history must be at least 1 tick")
+    return {
+        'screen_width': args.width,
+        'screen_height': args.height,
+        'world_width': args.world_width,
+        'world_height': args.world_height,
+        'object_count': args.objects,
+        'object_size': args.size,
+        'speed_min': args.speed_min,
+        'speed_max': args.speed_max,
+        'collision_coverage': args.coverage / 100.0,
+        'collision_mode': args.collisions,
+        'max_substep_travel': args.substep_travel,
+        'population_history': args.population_history,
+        'rules': args.rules
+    }
+
+def run_headless(settings, max_ticks=None, seed=None, replay_path=None, telemetry_path=None,
+                 snapshot_interval=None, checkpoint_path=None, checkpoint_interval=None,
+                 resume_path=None):
+    """Run one round without a window (or continue a checkpointed one) and print the result"""
+    if resume_path is not None:
+        from rps_checkpoint import load_checkpoint
+        simulation = load_checkpoint(resume_path)
+        print(f"Resuming seed {simulation.seed} at tick {simulation.tick}")
+    else:
+        simulation = Simulation(settings, seed)
+    start_tick = simulation.tick
+    # max_ticks counts from where this run starts, like `rps_checkpoint.py fork`
+    stop_tick = None if max_ticks is None else start_tick + max_ticks
+    start = time.perf_counter()
+    if replay_path is None and telemetry_path is None and checkpoint_path is None:
+        winner_type = simulation.run(stop_tick)
+    else:
+        recorders = []
+        try:
+            if checkpoint_path is not None:
+                from rps_checkpoint import Checkpointer, DEFAULT_CHECKPOINT_INTERVAL
+                recorders.append(Checkpointer(checkpoint_path, simulation,
+                                              checkpoint_interval or DEFAULT_CHECKPOINT_INTERVAL))
+            if replay_path is not None:
+                from rps_replay import ReplayWriter
+                recorders.append(ReplayWriter(replay_path, simulation))
+            if telemetry_path is not None:
+                from rps_telemetry import TelemetryWriter, DEFAULT_SNAPSHOT_INTERVAL
+                recorders.append(TelemetryWriter(telemetry_path, simulation,
+                                                 snapshot_interval or DEFAULT_SNAPSHOT_INTERVAL))
+            while not simulation.game_over and (stop_tick is None or simulation.tick < stop_tick):
+                simulation.step()
+                for recorder in recorders:
+                    recorder.record(simulation)
+        finally:
+            for recorder in recorders:
+                recorder.close(simulation)
+        winner_type = simulation.winner_type
+    elapsed = time.perf_counter() - start
+    
+    if winner_type is None:
+        reason = "stalemate" if simulation.game_over else "no winner"
+        print(f"{reason.capitalize()} after {simulation.tick} ticks")
+    else:
+        print(f"WINNER: {simulation.rules.names[winner_type]} after {simulation.tick} ticks (seed {simulation.seed})")
+    ticks = simulation.tick - start_tick
+    print(f"Simulated in {elapsed:.2f}s ({ticks / max(elapsed, 1e-9):.0f} ticks/s)")
+    return simulation
+
 def main():
+    parser = argparse.ArgumentParser(description="Rock Paper Scissors Simulation")
+    parser.add_argument("--headless", action="store_true",
+                        help="run one round without a window or settings dialog")
+    parser.add_argument("--max-ticks", type=int, default=None,
+                        help="stop a headless round after this many ticks (with --resume, "
+                             "this many ticks after the checkpoint)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed for a reproducible headless round")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="record the headless round to a replay file (see rps_replay.py)")
+    parser.add_argument("--telemetry", metavar="DIR",
+                        help="stream populations, conversions and position snapshots of the "
+                             "headless round to this directory (see rps_telemetry.py)")
+    parser.add_argument("--snapshot-interval", type=int, default=None,
+                        help="ticks between telemetry position snapshots (default 100)")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="save the full state of the headless round to this file every "
+                             "--checkpoint-interval ticks and at the end (see rps_checkpoint.py)")
+    parser.add_argument("--checkpoint-interval", type=int, default=None,
+                        help="ticks between checkpoints (default 10000)")
+    parser.add_argument("--resume", metavar="PATH",
+                        help="continue the round saved in a checkpoint; its settings and seed "
+                             "replace the ones given here")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    
+    if args.headless:
+        run_headless(settings_from_args(parser, args), args.max_ticks, args.seed, args.replay,
+                     args.telemetry, args.snapshot_interval, args.checkpoint,
+                     args.checkpoint_interval, args.resume)
+        return
+    
+    if args.resume:
+        # Straight into the saved round, without the settings dialog
+        from rps_checkpoint import load_checkpoint
+        load_checkpoint(args.resume, Game).run()
+        return
+    
     print("Rock Paper Scissors Simulation")
     print("===============================")
     
@@ -575,12 +2371,19 @@ def main():
         return
     
     print(f"Starting game with settings:")
-    print(f"Screen: {settings['screen_width']}x{settings['screen_height']}")
+    print(f"Screen: {settings['screen_width']}x{settings['screen_height']}, "
+          f"world: {settings['world_width']}x{settings['world_height']}")
     print(f"Objects: {settings['object_count']} (size: {settings['object_size']})")
     print(f"Speed: {settings['speed_min']} - {settings['speed_max']}")
     print(f"Collision Coverage: {int(settings['collision_coverage'] * 100)}%")
+    print(f"Rules: {settings['rules']}")
     print("\nControls:")
     print("R - Restart game")
+    print("1/2/3/4 - Speed 1x/4x/16x/max")
+    print("D - Toggle dirty-rect rendering")
+    print("Arrows / mouse drag - Pan, mouse wheel or +/- - Zoom, F - Fit the world (large worlds)")
+    print("F3 - Profiler overlay, F4 - Save profile as CSV")
+    print("F5 - Save a checkpoint (continue later with --resume)")
     print("ESC - Exit game")
     print()
     
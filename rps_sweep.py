@@ -0,0 +1,272 @@
+"""
+Parameter sweeps over the SettingsDialog fields.
+
+Every settings option takes a list ("10,20,40") or an inclusive range
+("100:1000:300"), and the Cartesian product of all of them is played
+headlessly, `--rounds` seeded rounds per grid point, across all cores:
+
+    python rps_sweep.py --objects 30:300:90 --size 10,20 --coverage 50,100 --rounds 200
+
+Finished rounds are appended to one JSON lines file per grid point in the
+cache directory, named after a hash of the point's settings, base seed and
+tick limit. Rerunning the same sweep (or a larger one that overlaps it)
+only plays the rounds that are missing, so an interrupted sweep resumes
+where it stopped. Round seeds depend only on the base seed and the round
+number, so every grid point sees the same seeds.
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+
+from rps_simulation import (DEFAULT_SCREEN_WIDTH, DEFAULT_SCREEN_HEIGHT, DEFAULT_OBJECT_COUNT,
+                            DEFAULT_OBJECT_SIZE, DEFAULT_SPEED_MIN, DEFAULT_SPEED_MAX,
+                            DEFAULT_COLLISION_COVERAGE, DEFAULT_COLLISION_MODE, COLLISION_MODES,
+                            DEFAULT_SETTINGS, load_ruleset)
+from rps_tournament import DEFAULT_MAX_TICKS, play_round, play_rounds, round_seed, summarize
+
+DEFAULT_CACHE_DIR = "rps_sweep_cache"
+# Part of every cache key; bump it with any change to the simulation that
+# alters how a seeded round plays out, so old cached rounds are not reused
+SWEEP_CACHE_VERSION = 1
+
+# (option, settings key, type, default, divisor from option to setting value)
+SWEEP_PARAMETERS = (
+    ('width', 'screen_width', int, DEFAULT_SCREEN_WIDTH, 1),
+    ('height', 'screen_height', int, DEFAULT_SCREEN_HEIGHT, 1),
+    ('objects', 'object_count', int, DEFAULT_OBJECT_COUNT, 1),
+    ('size', 'object_size', int, DEFAULT_OBJECT_SIZE, 1),
+    ('speed_min', 'speed_min', float, DEFAULT_SPEED_MIN, 1),
+    ('speed_max', 'speed_max', float, DEFAULT_SPEED_MAX, 1),
+    ('coverage', 'collision_coverage', int, int(DEFAULT_COLLISION_COVERAGE * 100), 100),
+    ('collisions', 'collision_mode', str, DEFAULT_COLLISION_MODE, 1),
+    ('rules', 'rules', str, DEFAULT_SETTINGS['rules'], 1)
+)
+
+def parse_range(cast):
+    """Argument type for "a,b,c" lists and inclusive "start:stop[:step]" ranges"""
+    def parse(text):
+        values = []
+        for part in text.split(","):
+            if not part:
+                continue
+            if ":" in part:
+                fields = part.split(":")
+                if len(fields) not in (2, 3):
+                    raise argparse.ArgumentTypeError(f"bad range {part!r}, expected start:stop[:step]")
+                start, stop = cast(fields[0]), cast(fields[1])
+                step = cast(fields[2]) if len(fields) == 3 else cast(1)
+                if step <= 0:
+                    raise argparse.ArgumentTypeError(f"range step must be positive in {part!r}")
+                # Counting steps avoids float drift; a tiny tolerance keeps `stop` itself
+                count = int((stop - start) / step + 1e-9) + 1
+                values.extend(cast(start + step * index) for index in range(max(count, 0)))
+            else:
+                values.append(cast(part))
+        if not values:
+            raise argparse.ArgumentTypeError("no values given")
+        return values
+    return parse
+
+def grid_points(args):
+    """Settings dict for every combination of the swept values, and the invalid ones"""
+    options = [getattr(args, option) for option, _, _, _, _ in SWEEP_PARAMETERS]
+    points = []
+    skipped = []
+    for values in itertools.product(*options):
+        settings = {key: value / divisor if divisor != 1 else value
+                    for (_, key, _, _, divisor), value in zip(SWEEP_PARAMETERS, values)}
+        # Same checks as SettingsDialog.validate_settings
+        try:
+            type_count = len(load_ruleset(settings['rules']))
+        except ValueError as e:
+            skipped.append((settings, str(e)))
+            continue
+        if settings['speed_min'] >= settings['speed_max']:
+            skipped.append((settings, "min speed must be less than max speed"))
+        elif settings['object_count'] < type_count or settings['object_count'] % type_count != 0:
+            skipped.append((settings, f"object count must be a positive multiple of {type_count}"))
+        elif settings['collision_mode'] not in COLLISION_MODES:
+            skipped.append((settings, f"collision mode must be one of {', '.join(COLLISION_MODES)}"))
+        else:
+            points.append(settings)
+    return points, skipped
+
+def point_key(settings, base_seed, max_ticks):
+    """Cache file name of one grid point"""
+    # The ruleset's species and dominance matrix, not just its name, so an
+    # edited ruleset file gets fresh rounds
+    rules = load_ruleset(settings['rules'])
+    identity = json.dumps({'version': SWEEP_CACHE_VERSION, 'settings': settings,
+                           'rules': [list(rules.names.values()), rules.beats_matrix.tolist()],
+                           'seed': base_seed, 'max_ticks': max_ticks},
+                          sort_keys=True)
+    return hashlib.sha1(identity.encode()).hexdigest()[:16]
+
+def load_cached_rounds(path):
+    """Round results already played for a grid point, by round number"""
+    rounds = {}
+    if not os.path.exists(path):
+        return rounds
+    with open(path) as cache_file:
+        for line in cache_file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            rounds[result['round']] = result
+    return rounds
+
+def _sweep_job(job):
+    key, round_index, settings, seed, max_ticks = job
+    result = play_round(settings, seed, max_ticks)
+    result['round'] = round_index
+    return key, result
+
+def run_sweep(points, rounds, base_seed=0, max_ticks=DEFAULT_MAX_TICKS, workers=None,
+              cache_dir=DEFAULT_CACHE_DIR, progress=None):
+    """Play every missing round of every grid point and return [(settings, round results)]"""
+    os.makedirs(cache_dir, exist_ok=True)
+    keys = [point_key(settings, base_seed, max_ticks) for settings in points]
+    cached = {key: load_cached_rounds(os.path.join(cache_dir, key + ".jsonl")) for key in keys}
+    jobs = [(key, index, settings, round_seed(base_seed, index), max_ticks)
+            for key, settings in zip(keys, points)
+            for index in range(rounds) if index not in cached[key]]
+
+    if jobs:
+        # One pool over all grid points keeps every core busy until the very end
+        files = {}
+        try:
+            for done, (key, result) in enumerate(play_rounds(_sweep_job, jobs, workers), 1):
+                cache_file = files.get(key)
+                if cache_file is None:
+                    cache_file = files[key] = open(os.path.join(cache_dir, key + ".jsonl"), "a")
+                cache_file.write(json.dumps(result) + "\n")
+                cache_file.flush()
+                cached[key][result['round']] = result
+                if progress:
+                    progress(done, len(jobs))
+        finally:
+            for cache_file in files.values():
+                cache_file.close()
+
+    return [(settings, [cached[key][index] for index in range(rounds)])
+            for key, settings in zip(keys, points)]
+
+def table_rows(sweep):
+    """One flat row per grid point: its settings, win shares, draws and ticks to victory"""
+    rows = []
+    for settings, results in sweep:
+        report = summarize(results, load_ruleset(settings['rules']))
+        row = {
+            'width': settings['screen_width'],
+            'height': settings['screen_height'],
+            'objects': settings['object_count'],
+            'size': settings['object_size'],
+            'speed_min': settings['speed_min'],
+            'speed_max': settings['speed_max'],
+            'coverage': round(settings['collision_coverage'] * 100),
+            'collisions': settings['collision_mode'],
+            'rules': settings['rules'],
+            'rounds': report['rounds']
+        }
+        for name, wins in report['wins'].items():
+            row[name] = wins['probability']
+        row['draws'] = report['draws'] / report['rounds'] if report['rounds'] else 0.0
+        ticks = report['ticks']
+        row['ticks_mean'] = ticks['mean'] if ticks else None
+        row['ticks_p50'] = ticks['percentiles']['p50'] if ticks else None
+        row['ticks_p95'] = ticks['percentiles']['p95'] if ticks else None
+        rows.append(row)
+    return rows
+
+def species_columns(rows):
+    """Win share columns of all rows' rulesets, in order of first appearance"""
+    names = {}
+    for row in rows:
+        keys = list(row)
+        # table_rows puts them between 'rounds' and 'draws'
+        names.update(dict.fromkeys(keys[keys.index('rounds') + 1:keys.index('draws')]))
+    return list(names)
+
+def format_table(rows):
+    """Fixed-width text table of table_rows(); species missing from a row's rules show as -"""
+    names = species_columns(rows)
+    header = (f"{'width':>6} {'height':>6} {'objects':>7} {'size':>4} {'spd_min':>7} {'spd_max':>7} "
+              f"{'cov%':>4} {'collisions':>10} {'rules':>9} {'rounds':>6} "
+              + " ".join(f"{name:>8}" for name in names)
+              + f" {'draws':>6} {'ticks':>8} {'p50':>8} {'p95':>8}")
+    lines = [header, "-" * len(header)]
+
+    def ticks(value):
+        return f"{value:8.0f}" if value is not None else f"{'-':>8}"
+
+    def share(value):
+        return f"{value:8.1%}" if value is not None else f"{'-':>8}"
+
+    for row in rows:
+        lines.append(f"{row['width']:>6} {row['height']:>6} {row['objects']:>7} {row['size']:>4} "
+                     f"{row['speed_min']:>7g} {row['speed_max']:>7g} {row['coverage']:>4} "
+                     f"{row['collisions']:>10} {row['rules']:>9} {row['rounds']:>6} "
+                     + " ".join(share(row.get(name)) for name in names)
+                     + f" {row['draws']:6.1%} {ticks(row['ticks_mean'])} {ticks(row['ticks_p50'])} "
+                     f"{ticks(row['ticks_p95'])}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play a grid of settings headlessly and tabulate the winners",
+        epilog="Settings take a comma separated list and/or inclusive start:stop:step ranges.")
+    group = parser.add_argument_group("swept settings")
+    for option, _, cast, default, _ in SWEEP_PARAMETERS:
+        group.add_argument("--" + option.replace("_", "-"), type=parse_range(cast), default=[cast(default)],
+                           metavar="VALUES",
+                           help=f"default {default}" + (" (collision coverage %%)" if option == 'coverage' else ""))
+    parser.add_argument("--rounds", type=int, default=100, help="rounds per grid point")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed of every grid point")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS,
+                        help="rounds still running after this many ticks count as draws")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_DIR,
+                        help=f"directory for finished rounds (default {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--csv", metavar="PATH", help="also write the table as CSV")
+    parser.add_argument("--json", action="store_true", help="print the table as JSON")
+    args = parser.parse_args()
+
+    points, skipped = grid_points(args)
+    for settings, reason in skipped:
+        print(f"Skipping {settings}: {reason}", file=sys.stderr)
+    if not points:
+        parser.error("no valid grid points")
+
+    def progress(done, total):
+        print(f"\rPlayed {done}/{total} rounds", end="", file=sys.stderr)
+
+    start = time.perf_counter()
+    sweep = run_sweep(points, args.rounds, args.seed, args.max_ticks, args.workers, args.cache,
+                      progress)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+
+    rows = table_rows(sweep)
+    if args.csv:
+        with open(args.csv, "w", newline="") as csv_file:
+            names = species_columns(rows)
+            fieldnames = list(rows[0])
+            start, stop = fieldnames.index('rounds') + 1, fieldnames.index('draws')
+            writer = csv.DictWriter(csv_file, fieldnames=fieldnames[:start] + names + fieldnames[stop:])
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(format_table(rows))
+        print(f"{len(points)} grid points, {args.rounds} rounds each, finished in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Streaming telemetry export for analysing population dynamics outside the app.
+
+A TelemetryWriter is fed a simulation after every step, like ReplayWriter,
+and writes three streams into a directory:
+
+    meta.json               settings, seed, object names and the result
+    population_NNNNNN.npz   tick (int64), counts (int32, one column per type)
+    conversions_NNNNNN.npz  tick (int64), index (uint32), winner (int8),
+                            loser (int8), x, y (float32, after the tick)
+    snapshot_TTTTTTTTT.npz  x, y (float32) and type (int8) of every object
+                            at tick T, every `snapshot_interval` ticks
+                            and at the final tick
+
+Each .npz chunk holds one plain .npy array per column, so it loads with
+np.load() and no other dependency. The simulation thread only copies rows
+into fixed-size buffers; full chunks go through a bounded queue to a
+background thread that does the file I/O. When the disk can't keep up the
+queue blocks the simulation instead of growing, so memory stays flat on
+arbitrarily long runs. Chunks are found by name, so the streams of an
+interrupted run can still be read.
+"""
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+
+DEFAULT_SNAPSHOT_INTERVAL = 100
+# Ticks per population chunk; conversion chunks are flushed with them
+DEFAULT_CHUNK_TICKS = 4096
+# Chunks and snapshots waiting for the writer thread
+DEFAULT_QUEUE_SIZE = 16
+
+META_FILE = "meta.json"
+
+class TelemetryError(Exception):
+    """Raised when the writer thread failed or a telemetry directory is malformed"""
+
+class TelemetryWriter:
+    """Streams a simulation's telemetry to `directory`; call record() after every step()"""
+    def __init__(self, directory, simulation, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL,
+                 chunk_ticks=DEFAULT_CHUNK_TICKS, queue_size=DEFAULT_QUEUE_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.chunk_ticks = chunk_ticks
+        self.type_count = len(simulation.rules)
+        self.meta = {
+            'settings': simulation.settings,
+            'seed': simulation.seed,
+            'object_count': len(simulation.objects),
+            'object_names': list(simulation.rules.names.values()),
+            'snapshot_interval': snapshot_interval,
+            'chunk_ticks': chunk_ticks,
+            'last_tick': simulation.tick,
+            'finished': False,
+            'winner_type': None
+        }
+        self._write_meta()
+
+        self.chunk_index = {'population': 0, 'conversions': 0}
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._writer, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+        self._new_buffers()
+        self.record(simulation)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _new_buffers(self):
+        self.ticks = np.empty(self.chunk_ticks, dtype=np.int64)
+        self.counts = np.empty((self.chunk_ticks, self.type_count), dtype=np.int32)
+        self.rows = 0
+        # Per-tick (tick, conversions, x, y) batches, joined when the chunk is flushed
+        self.conversion_batches = []
+
+    def _write_meta(self):
+        path = os.path.join(self.directory, META_FILE)
+        with open(path + ".tmp", "w") as meta_file:
+            json.dump(self.meta, meta_file, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def _writer(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue  # keep draining so the simulation thread never blocks forever
+            name, columns = item
+            try:
+                np.savez(os.path.join(self.directory, name), **columns)
+            except Exception as e:
+                self.error = e
+
+    def _put(self, name, columns):
+        if self.error is not None:
+            raise TelemetryError(f"telemetry writer failed: {self.error}")
+        self.queue.put((name, columns))
+
+    def _chunk_name(self, stream):
+        index = self.chunk_index[stream]
+        self.chunk_index[stream] += 1
+        return f"{stream}_{index:06d}.npz"
+
+    def _flush(self):
+        if self.rows:
+            self._put(self._chunk_name('population'),
+                      {'tick': self.ticks[:self.rows], 'counts': self.counts[:self.rows]})
+        if self.conversion_batches:
+            ticks, events, xs, ys = zip(*self.conversion_batches)
+            events = np.concatenate(events)
+            self._put(self._chunk_name('conversions'), {
+                'tick': np.repeat(np.array(ticks, dtype=np.int64), [len(batch) for batch in xs]),
+                'index': events[:, 0].astype(np.uint32),
+                'winner': events[:, 1].astype(np.int8),
+                'loser': events[:, 2].astype(np.int8),
+                'x': np.concatenate(xs),
+                'y': np.concatenate(ys)
+            })
+        self._new_buffers()
+
+    def _snapshot(self, simulation):
+        pool = simulation.objects
+        self._put(f"snapshot_{simulation.tick:09d}.npz",
+                  {'x': pool.x.astype(np.float32), 'y': pool.y.astype(np.float32),
+                   'type': pool.type.copy()})
+
+    def record(self, simulation):
+        """Log the population and conversions of the tick that was just stepped"""
+        tick = simulation.tick
+        self.ticks[self.rows] = tick
+        self.counts[self.rows] = simulation.counts
+        self.rows += 1
+
+        if simulation.conversions:
+            events = np.array(simulation.conversions, dtype=np.int64)
+            pool = simulation.objects
+            self.conversion_batches.append((tick, events,
+                                            pool.x[events[:, 0]].astype(np.float32),
+                                            pool.y[events[:, 0]].astype(np.float32)))
+
+        if tick % self.snapshot_interval == 0:
+            self._snapshot(simulation)
+
+        self.last_tick = tick
+        if self.rows == self.chunk_ticks:
+            self._flush()
+
+    def close(self, simulation=None):
+        """Flush everything and wait for the writer; pass the simulation to mark the final result"""
+        if not self.thread.is_alive():
+            return
+        try:
+            if simulation is not None and simulation.tick % self.snapshot_interval:
+                self._snapshot(simulation)
+            self._flush()
+        finally:
+            self.queue.put(None)
+            self.thread.join()
+        self.meta['last_tick'] = self.last_tick
+        if simulation is not None:
+            self.meta['finished'] = simulation.game_over
+            self.meta['winner_type'] = simulation.winner_type
+        self._write_meta()
+        if self.error is not None:
+            raise TelemetryError(f"telemetry writer failed: {self.error}")
+
+def read_meta(directory):
+    try:
+        with open(os.path.join(directory, META_FILE)) as meta_file:
+            return json.load(meta_file)
+    except (OSError, ValueError) as e:
+        raise TelemetryError(f"{directory} is not a telemetry directory: {e}")
+
+def chunk_paths(directory, stream):
+    """Chunk files of one stream in order (the zero-padded names sort correctly)"""
+    return sorted(glob.glob(os.path.join(directory, f"{stream}_*.npz")))
+
+def read_stream(directory, stream):
+    """All chunks of the 'population' or 'conversions' stream, joined column by column"""
+    chunks = []
+    for path in chunk_paths(directory, stream):
+        with np.load(path) as chunk:
+            chunks.append({column: chunk[column] for column in chunk.files})
+    if not chunks:
+        return {}
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in chunks[0]}
+
+def iter_snapshots(directory):
+    """Yield (tick, x, y, type) for every position snapshot in tick order"""
+    for path in chunk_paths(directory, 'snapshot'):
+        tick = int(os.path.basename(path)[len("snapshot_"):-len(".npz")])
+        with np.load(path) as snapshot:
+            yield tick, snapshot['x'], snapshot['y'], snapshot['type']
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise a telemetry directory")
+    parser.add_argument("directory", help="directory written with --telemetry")
+    args = parser.parse_args()
+
+    try:
+        meta = read_meta(args.directory)
+    except TelemetryError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    population = read_stream(args.directory, 'population')
+    conversions = read_stream(args.directory, 'conversions')
+    last_tick = int(population['tick'][-1]) if population else meta['last_tick']
+    print(f"Seed: {meta['seed']}, objects: {meta['object_count']}, ticks: {last_tick}")
+    if meta['finished']:
+        winner = meta['winner_type']
+        print(f"Finished: {'stalemate' if winner is None else meta['object_names'][winner]}")
+    else:
+        print("Run did not finish")
+    print(f"Population rows: {len(population.get('tick', ()))}, "
+          f"conversions: {len(conversions.get('tick', ()))}, "
+          f"snapshots: {len(chunk_paths(args.directory, 'snapshot'))}")
+    if conversions:
+        names = meta['object_names']
+        pairs = np.stack([conversions['winner'], conversions['loser']], axis=1)
+        unique, counts = np.unique(pairs, axis=0, return_counts=True)
+        for (winner, loser), count in zip(unique.tolist(), counts.tolist()):
+            print(f"  {names[winner]} beat {names[loser]}: {count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from rps_simulation import (Simulation, RULESETS, add_settings_arguments, settings_from_args,
+                            load_ruleset)
+
+# Rounds that have not finished after this many ticks count as a draw
+DEFAULT_MAX_TICKS = 100000
+
+# z value for 95% confidence intervals
+Z_95 = 1.959964
+
+def round_seed(base_seed, round_index):
+    """Independent, reproducible seed for one round of a tournament"""
+    return int(np.random.SeedSequence([base_seed, round_index]).generate_state(1)[0])
+
+def play_round(settings, seed, max_ticks=DEFAULT_MAX_TICKS):
+    """Play one seeded headless round and summarise its population curve"""
+    simulation = Simulation(settings, seed)
+    simulation.run(max_ticks)
+    return round_result(simulation, seed)
+
+def round_result(simulation, seed):
+    """Winner, length and population curve summary of a finished (or stopped) round"""
+    # The simulation keeps its peaks and extinctions up to date every tick,
+    # so the curve summary needs no scan of the history
+    return {
+        'seed': seed,
+        'winner_type': simulation.winner_type,
+        'ticks': simulation.tick,
+        'peak': list(simulation.population_peak),
+        'peak_tick': list(simulation.peak_tick),
+        'extinction_tick': list(simulation.extinction_tick),
+        'final': list(simulation.counts)
+    }
+
+def _play_round_job(job):
+    settings, seed, max_ticks = job
+    return play_round(settings, seed, max_ticks)
+
+def play_rounds(function, jobs, workers=None):
+    """Run `function` over `jobs` in a process pool, yielding each result as it finishes"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for job in jobs:
+            yield function(job)
+        return
+
+    # Small chunks keep every core busy even though round lengths vary a lot
+    chunksize = max(1, len(jobs) // (workers * 16))
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(function, jobs, chunksize):
+            yield result
+
+def collect_results(results, total, label, results_path=None, quiet=False):
+    """
+    Gather the results of play_rounds() as they finish, streaming each to a
+    JSON lines file and a progress line on stderr; returns (results, seconds)
+    """
+    collected = []
+    results_file = open(results_path, "w") if results_path else None
+    start = time.perf_counter()
+    try:
+        for result in results:
+            collected.append(result)
+            if results_file:
+                results_file.write(json.dumps(result) + "\n")
+            if not quiet:
+                print(f"\rPlayed {len(collected)}/{total} {label}", end="", file=sys.stderr)
+    finally:
+        if results_file:
+            results_file.close()
+    return collected, time.perf_counter() - start
+
+def iter_rounds(settings, rounds, base_seed=0, max_ticks=DEFAULT_MAX_TICKS, workers=None):
+    """Play `rounds` seeded rounds over a process pool, yielding each result as it finishes"""
+    jobs = [(settings, round_seed(base_seed, index), max_ticks) for index in range(rounds)]
+    return play_rounds(_play_round_job, jobs, workers)
+
+def wilson_interval(successes, trials, z=Z_95):
+    """Wilson score confidence interval for a proportion"""
+    if trials == 0:
+        return (0.0, 1.0)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return (max(0.0, center - margin), min(1.0, center + margin))
+
+def summarize(results, rules=None):
+    """Aggregate per-round results into win probabilities and rounds-to-victory stats"""
+    results = list(results)
+    rounds = len(results)
+    report = {'rounds': rounds, 'wins': {}, 'draws': 0, 'ticks': None}
+
+    for obj_type, name in (rules or RULESETS['classic']).names.items():
+        wins = sum(1 for result in results if result['winner_type'] == obj_type)
+        low, high = wilson_interval(wins, rounds)
+        report['wins'][name] = {
+            'count': wins,
+            'probability': wins / rounds if rounds else 0.0,
+            'ci95': [low, high]
+        }
+    report['draws'] = sum(1 for result in results if result['winner_type'] is None)
+
+    ticks = np.array([result['ticks'] for result in results
+                      if result['winner_type'] is not None], dtype=np.float64)
+    if len(ticks):
+        mean = float(ticks.mean())
+        std = float(ticks.std(ddof=1)) if len(ticks) > 1 else 0.0
+        margin = Z_95 * std / math.sqrt(len(ticks))
+        p5, p25, p50, p75, p95 = np.percentile(ticks, [5, 25, 50, 75, 95]).tolist()
+        report['ticks'] = {
+            'mean': mean,
+            'std': std,
+            'ci95': [mean - margin, mean + margin],
+            'min': int(ticks.min()),
+            'max': int(ticks.max()),
+            'percentiles': {'p5': p5, 'p25': p25, 'p50': p50, 'p75': p75, 'p95': p95}
+        }
+    return report
+
+def format_report(report):
+    """Human readable version of a summarize() report"""
+    lines = [f"Rounds: {report['rounds']}"]
+    for name, wins in report['wins'].items():
+        low, high = wins['ci95']
+        lines.append(f"{name:>9}: {wins['probability']:6.1%}  "
+                     f"(95% CI {low:6.1%} - {high:6.1%}, {wins['count']} wins)")
+    lines.append(f"    Draws: {report['draws']} (stalemates and rounds without a winner within the tick limit)")
+
+    ticks = report['ticks']
+    if ticks:
+        low, high = ticks['ci95']
+        percentiles = ticks['percentiles']
+        lines.append(f"Ticks to victory: mean {ticks['mean']:.0f} "
+                     f"(95% CI {low:.0f} - {high:.0f}), std {ticks['std']:.0f}")
+        lines.append(f"  min {ticks['min']}, p5 {percentiles['p5']:.0f}, p25 {percentiles['p25']:.0f}, "
+                     f"median {percentiles['p50']:.0f}, p75 {percentiles['p75']:.0f}, "
+                     f"p95 {percentiles['p95']:.0f}, max {ticks['max']}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play many seeded headless rounds and estimate win probabilities")
+    parser.add_argument("--rounds", type=int, default=1000, help="number of rounds to play")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the whole tournament")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS,
+                        help="rounds still running after this many ticks count as draws")
+    parser.add_argument("--results", help="stream per-round results to this JSON lines file")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    settings = settings_from_args(parser, args)
+
+    results, elapsed = collect_results(
+        iter_rounds(settings, args.rounds, args.seed, args.max_ticks, args.workers),
+        args.rounds, "rounds", args.results, quiet=args.json)
+
+    report = summarize(results, load_ruleset(settings['rules']))
+    report['settings'] = settings
+    report['seed'] = args.seed
+    report['elapsed'] = elapsed
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(file=sys.stderr)
+        print(format_report(report))
+        print(f"Finished in {elapsed:.1f}s ({args.rounds / max(elapsed, 1e-9):.1f} rounds/s)")
+
+if __name__ == "__main__":
+    main()